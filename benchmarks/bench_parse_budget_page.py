@@ -0,0 +1,61 @@
+## STREAMING LXML PAGE PARSER VS READ_HTML + CLEAN_MONEY ##
+# run from the repository root: uv run python -m benchmarks.bench_parse_budget_page
+# the fixtures are saved 100-row pages laid out like The-Numbers budget listing
+import os
+import glob
+import argparse
+import pandas as pd
+from io import StringIO
+from benchmarks.timing import best_of, report
+from benchmarks.bench_parse_money import clean_money
+from src.downloading.webscraping import MONEY_COLUMNS, parse_budget_page
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+def read_html_page(html: str) -> pd.DataFrame:
+    """
+    The scraper's original read_html parsing, kept here as the baseline
+    """
+    df = pd.read_html(StringIO(html))[0]
+    df.columns = [col.strip() for col in df.columns]
+    if df.columns[0] != "Index":
+        df.rename(columns={df.columns[0]: "Index"}, inplace=True)
+    df.set_index("Index", inplace=True)
+    for col in MONEY_COLUMNS:
+        df[col] = df[col].apply(clean_money)
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks parse_budget_page")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_PATH, "budgets_page_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages.append(f.read())
+    for html in pages:
+        old, new = read_html_page(html), parse_budget_page(html)
+        assert list(old["Movie"]) == list(new["Movie"]), "titles disagree"
+        for col in MONEY_COLUMNS:
+            assert list(old[col]) == list(new[col]), f"{col} disagrees"
+    rows = sum(len(parse_budget_page(html)) for html in pages)
+    report(
+        f"Budget page parsing, {len(pages)} saved pages",
+        rows,
+        "rows",
+        {
+            "read_html + clean_money": best_of(
+                lambda: [read_html_page(html) for html in pages], args.repeat
+            ),
+            "parse_budget_page": best_of(
+                lambda: [parse_budget_page(html) for html in pages], args.repeat
+            ),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+## PARSE_MONEY VS THE PER-VALUE CLEAN_MONEY IT REPLACED ##
+# run from the repository root: uv run python -m benchmarks.bench_parse_money
+import argparse
+import random
+import pandas as pd
+from benchmarks.timing import best_of, report
+from src.processing.cleaner_tools import parse_money
+
+
+def clean_money(value: str) -> int | None:
+    """
+    The scraper's original per-value parser, kept here as the baseline
+    """
+    return (
+        int(value.replace("$", "").replace(",", "").replace("\xa0", "").strip())
+        if value.strip()
+        else None
+    )
+
+
+def make_values(count: int, seed: int = 440) -> pd.Series:
+    """
+    Builds currency strings shaped like the scraped money columns
+    (e.g., '$237,000,000', '$\xa01,349,711'), with a few blanks
+    """
+    rng = random.Random(seed)
+    values = []
+    for _ in range(count):
+        if rng.random() < 0.02:
+            values.append(" ")
+            continue
+        amount = rng.randrange(0, 3_000_000_000)
+        space = "\xa0" if rng.random() < 0.1 else ""
+        values.append(f"${space}{amount:,}")
+    return pd.Series(values)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks parse_money")
+    parser.add_argument("--values", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    values = make_values(args.values)
+    expected = values.apply(clean_money).astype("Int64")
+    assert parse_money(values).equals(expected), "parse_money disagrees"
+    report(
+        "Money parsing",
+        len(values),
+        "values",
+        {
+            "Series.apply(clean_money)": best_of(
+                lambda: values.apply(clean_money), args.repeat
+            ),
+            "parse_money": best_of(lambda: parse_money(values), args.repeat),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+## VECTORIZED SPLIT_GENRES_LIST VS THE PER-ROW SAFE_SPLIT APPLY ##
+# run from the repository root: uv run python -m benchmarks.bench_split_genres
+import argparse
+import random
+import pandas as pd
+from benchmarks.timing import best_of, report
+from src.processing.cleaner_tools import split_genres_list
+
+GENRES = [
+    "Action",
+    "Adventure",
+    "Animation",
+    "Comedy",
+    "Crime",
+    "Documentary",
+    "Drama",
+    "Family",
+    "Fantasy",
+    "History",
+    "Horror",
+    "Music",
+    "Mystery",
+    "Romance",
+    "Science Fiction",
+    "Thriller",
+    "War",
+    "Western",
+]
+
+
+def safe_split_genres(df: pd.DataFrame, genre_column: str = "genre") -> pd.DataFrame:
+    """
+    The original split_genres_list (a per-row apply), kept here as the baseline
+    """
+    df = df.copy()
+    df[genre_column] = df[genre_column].fillna("")
+
+    def safe_split(genres):
+        if isinstance(genres, str) and genres.strip() != "":
+            return [g.strip().title() for g in genres.split(",") if g.strip()]
+        else:
+            return []
+
+    df[genre_column] = df[genre_column].apply(safe_split)
+    return df
+
+
+def make_movies(count: int, seed: int = 440) -> pd.DataFrame:
+    """
+    Builds movies with TMDb-style genre strings (e.g., 'Drama, Romance'),
+    including missing and blank ones
+    """
+    rng = random.Random(seed)
+    genres = []
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            genres.append(None)
+        elif roll < 0.08:
+            genres.append("")
+        else:
+            genres.append(", ".join(rng.sample(GENRES, rng.randrange(1, 4))))
+    return pd.DataFrame({"movie_id": range(count), "genre": genres})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks split_genres_list")
+    parser.add_argument("--rows", type=int, default=300_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    movies = make_movies(args.rows)
+    expected = safe_split_genres(movies)["genre"].tolist()
+    assert split_genres_list(movies)["genre"].tolist() == expected, "lists disagree"
+    report(
+        "Genre splitting",
+        len(movies),
+        "rows",
+        {
+            "apply(safe_split)": best_of(
+                lambda: safe_split_genres(movies), args.repeat
+            ),
+            "split_genres_list": best_of(
+                lambda: split_genres_list(movies), args.repeat
+            ),
+            "split_genres_list (long)": best_of(
+                lambda: split_genres_list(movies, long_format=True), args.repeat
+            ),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
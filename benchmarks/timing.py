@@ -0,0 +1,44 @@
+## SHARED TIMING FOR THE BENCHMARK SCRIPTS ##
+import time
+from typing import Callable
+
+
+def best_of(func: Callable, repeat: int = 5) -> float:
+    """
+    Runs a function several times and returns its fastest wall time, which is
+    the least disturbed by other work on the machine
+    ---
+    Args:
+        func (Callable): the code to time (called without arguments)
+        repeat (int): number of timed runs
+    Returns:
+        float: the fastest run in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def report(title: str, items: int, unit: str, timings: dict) -> None:
+    """
+    Prints the timings of each variant with its throughput and its speedup
+    over the first (baseline) variant
+    ---
+    Args:
+        title (str): what was benchmarked
+        items (int): number of items each run processed
+        unit (str): name of the items (e.g., 'values', 'rows')
+        timings (dict): variant name -> best time in seconds, baseline first
+    """
+    baseline = next(iter(timings.values()))
+    width = max(len(name) for name in timings)
+    print(f"{title} ({items:,} {unit})")
+    for name, seconds in timings.items():
+        print(
+            f"  {name:<{width}}  {seconds:>9.4f}s  "
+            f"{items / seconds:>14,.0f} {unit}/sec  {baseline / seconds:>6.1f}x"
+        )
+    return
@@ -1,7 +1,9 @@
 import os
 from src.utils.logging import logs_exist, clear_logs
+from src.utils.pipeline import Stage, Pipeline
 from src.database.database import MovieDB
 from src.processing.merging import cleaning_and_merging
+from src.processing.storage import read_frame, write_frame, store_path
 from src.downloading.downloading import download_kaggle_dataset
 from src.downloading.webscraping import webscrape_budgets
 from src.processing.cleaning import (
@@ -12,18 +14,179 @@ from src.processing.cleaning import (
 from src.utils.helpers import (
     TMDB_RAW_PATH,
     GENRES_RAW_PATH,
+    BUDGET_RAW_PATH,
     BUDGET_RAW_FILE,
+    TMDB_OUTPUT_PATH,
+    GENRES_OUTPUT_PATH,
+    BUDGET_OUTPUT_PATH,
+    MERGED_MOVIES_PATH,
+    MERGED_BUDGETS_PATH,
+    GENRE_TABLE_PATH,
+    MOVIE_GENRE_LINKS_PATH,
     KAGGLE_TMDB,
     KAGGLE_IMDB,
     MOVIE_DB_PATH,
 )
 from src.dash.dashboard import run_app
+import src.database.database as database_module
+import src.downloading.downloading as downloading_module
+import src.downloading.webscraping as webscraping_module
+import src.processing.cleaner_tools as cleaner_tools_module
+import src.processing.cleaning as cleaning_module
+import src.processing.matching as matching_module
+import src.processing.merging as merging_module
+import src.processing.storage as storage_module
+import src.utils.helpers as helpers_module
+
+MERGED_PATHS = [
+    MERGED_MOVIES_PATH,
+    MERGED_BUDGETS_PATH,
+    GENRE_TABLE_PATH,
+    MOVIE_GENRE_LINKS_PATH,
+]
+
+
+def merge_stage() -> None:
+    """
+    Merges the cleaned datasets and stores the merged tables for the load stage
+    """
+    merged = cleaning_and_merging(export=False, use_processed=True)
+    for df, path in zip(merged, MERGED_PATHS):
+        write_frame(df, path)
+    return
+
+
+def load_stage() -> None:
+    """
+    Rebuilds the database from the merged tables in the processed store.
+    The rebuild creates the current derived tables and ANALYTICS_INDEXES, so it
+    also migrates databases built with an older schema or index set
+    """
+    # the load inserts with OR IGNORE, so a rebuild starts from an empty file
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(MOVIE_DB_PATH + suffix):
+            os.remove(MOVIE_DB_PATH + suffix)
+    movies_df, budgets_df, genre_table, movie_genre_links = (
+        read_frame(path) for path in MERGED_PATHS
+    )
+    db = MovieDB(create=True, build=True)
+    db.load_from_dataframes(
+        movies_df=movies_df,
+        budgets_df=budgets_df,
+        genre_table=genre_table,
+        movie_genre_links=movie_genre_links,
+    )
+    return
+
+
+def build_pipeline(max_pages: int = 63) -> Pipeline:
+    """
+    Builds the stage graph of the data pipeline. Each stage is fingerprinted on
+    its input file hashes, code version and parameters
+    Remote sources cannot be hashed up front, so the download and scrape stages
+    always run and apply their own freshness checks: the Kaggle downloads fetch
+    only new dataset versions and replace only changed CSVs, and the scrape
+    revalidates cached pages with conditional GETs. Downstream stages then
+    skip unless those raw files actually changed
+    """
+    clean_code = [cleaning_module, cleaner_tools_module, storage_module, helpers_module]
+    cleaned_stores = [
+        store_path(path)
+        for path in (TMDB_OUTPUT_PATH, GENRES_OUTPUT_PATH, BUDGET_OUTPUT_PATH)
+    ]
+    merged_stores = [store_path(path) for path in MERGED_PATHS]
+    return Pipeline(
+        [
+            Stage(
+                "download_genres",
+                download_kaggle_dataset,
+                outputs=[GENRES_RAW_PATH],
+                params={
+                    "kaggle_id": KAGGLE_IMDB,
+                    "output_dir": GENRES_RAW_PATH,
+                    "logger_name": "genres_logger",
+                    "log_filepath": "genres_download",
+                },
+                code=[downloading_module],
+                always_run=True,
+            ),
+            Stage(
+                "download_tmdb",
+                download_kaggle_dataset,
+                outputs=[TMDB_RAW_PATH],
+                params={
+                    "kaggle_id": KAGGLE_TMDB,
+                    "output_dir": TMDB_RAW_PATH,
+                    "logger_name": "tmdb_logger",
+                    "log_filepath": "tmdb_download",
+                },
+                code=[downloading_module],
+                always_run=True,
+            ),
+            Stage(
+                "scrape",
+                webscrape_budgets,
+                outputs=[BUDGET_RAW_FILE],
+                params={
+                    "budget_path": BUDGET_RAW_FILE,
+                    "max_pages": max_pages,
+                    # the listing is ranked by budget, not date, so new films
+                    # can shift any page; conditional GETs keep full reruns cheap
+                    "early_stop": False,
+                },
+                code=[webscraping_module],
+                always_run=True,
+            ),
+            Stage(
+                "clean_tmdb",
+                clean_tmdb_to_csv,
+                inputs=[TMDB_RAW_PATH],
+                outputs=[cleaned_stores[0]],
+                depends_on=["download_tmdb"],
+                code=clean_code,
+            ),
+            Stage(
+                "clean_genres",
+                clean_genres_to_csv,
+                inputs=[GENRES_RAW_PATH],
+                outputs=[cleaned_stores[1]],
+                depends_on=["download_genres"],
+                code=clean_code,
+            ),
+            Stage(
+                "clean_budgets",
+                clean_budgets_to_csv,
+                inputs=[BUDGET_RAW_PATH],
+                outputs=[cleaned_stores[2]],
+                depends_on=["scrape"],
+                code=clean_code,
+            ),
+            Stage(
+                "merge",
+                merge_stage,
+                inputs=cleaned_stores,
+                outputs=merged_stores,
+                depends_on=["clean_tmdb", "clean_genres", "clean_budgets"],
+                # the matching lives in its own module, and use_processed can
+                # reclean stale datasets inside this stage
+                code=[merging_module, matching_module, *clean_code],
+            ),
+            Stage(
+                "load",
+                load_stage,
+                inputs=merged_stores,
+                outputs=[MOVIE_DB_PATH],
+                depends_on=["merge"],
+                code=[database_module],
+            ),
+        ]
+    )
 
 
 def check_data_ready():
     print("Checking existing data status...")
-    # checking if logs exist
-    if not logs_exist():
+    # a recorded load stage means the last pipeline run built the database
+    if not build_pipeline().is_complete("load") and not logs_exist():
         print("Logs are missing. Data may be outdated.")
         return False
     # checking if the database exists and is queryable
@@ -33,53 +196,28 @@ def check_data_ready():
     try:
         db = MovieDB()
         db.run_query("SELECT 1;")
-        print("Database is present and queryable.")
-        return True
     except Exception as e:
         print(f"Database exists but is not queryable: {e}")
         return False
+    # derived tables and their indexes are only built (or brought up to date)
+    # by the load stage, never by the dashboard
+    missing = db.missing_schema()
+    if missing:
+        print(f"Database predates {', '.join(missing)}. It needs a new load.")
+        return False
+    print("Database is present and queryable.")
+    return True
 
 
-def run_data_pipeline(max_pages=63):
+def run_data_pipeline(max_pages=63, force=False, force_stages=None):
     print("Running data pipeline: download, clean, merge, database build...")
-
-    # download datasets
-    print("Downloading datasets...")
-    download_kaggle_dataset(
-        kaggle_id=KAGGLE_IMDB,
-        output_dir=GENRES_RAW_PATH,
-        target_filename=None,
-        logger_name="genres_logger",
-        log_filepath="genres_download",
-    )
-    download_kaggle_dataset(
-        kaggle_id=KAGGLE_TMDB,
-        output_dir=TMDB_RAW_PATH,
-        target_filename=None,
-        logger_name="tmdb_logger",
-        log_filepath="tmdb_download",
-    )
-    webscrape_budgets(budget_path=BUDGET_RAW_FILE, max_pages=max_pages)
-    print("Dataset download completed.")
-    print("Cleaning datasets...")
-    clean_tmdb_to_csv()
-    clean_genres_to_csv()
-    clean_budgets_to_csv()
-    print("Dataset cleaning completed.")
-
-    # merges datasets and builds database
-    print("Merging datasets and building database...")
-    movies_df, budgets_df, genre_table, movie_genre_links = cleaning_and_merging(
-        export=False
-    )
-    db = MovieDB(create=True)
-    db.load_from_dataframes(
-        movies_df=movies_df,
-        budgets_df=budgets_df,
-        genre_table=genre_table,
-        movie_genre_links=movie_genre_links,
+    # stages whose inputs, code and parameters are unchanged are skipped, and
+    # independent stages (downloads, cleaners) run concurrently
+    results = build_pipeline(max_pages=max_pages).run(
+        force=force, force_stages=force_stages
     )
-    print("Database build completed.")
+    ran = [name for name, result in results.items() if result["status"] == "ran"]
+    print(f"Pipeline completed. Ran {len(ran)} of {len(results)} stages.")
 
 
 if __name__ == "__main__":
@@ -94,7 +232,9 @@ if __name__ == "__main__":
         )
         if proceed == "y":
             clear_logs()
-            run_data_pipeline()
+            # the database failed the checks above, so its load reruns even
+            # when the stage's fingerprint is unchanged
+            run_data_pipeline(force_stages=["load"])
             print("Pipeline completed. Launching dashboard...")
             run_app()
         else:
@@ -0,0 +1,119 @@
+import sys
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable
+import pandas as pd
+from src.utils.helpers import RESULT_CACHE_MAX_BYTES
+
+
+def filter_key(filters: dict) -> str:
+    """
+    Canonical hash of a user-filters dict. Empty filters are dropped and
+    multi-select values are sorted, so equivalent selections share a key
+    (range filters keep their [min, max] order)
+    ---
+    Args:
+        filters (dict): filters as stored in the 'user-filters' Store
+    Returns:
+        str: hex digest identifying the filter selection
+    """
+    canonical = {}
+    for name, value in (filters or {}).items():
+        if not value:
+            continue
+        if isinstance(value, list) and not name.endswith("_range"):
+            value = sorted(value, key=str)
+        canonical[name] = value
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def result_size(value: Any) -> int:
+    """
+    Approximate size of a cached result in bytes
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(deep=True).sum())
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of query results bounded by their total size in
+    bytes. When a new result pushes the total over max_bytes, the least
+    recently used results are evicted first
+    ---
+    Args:
+        max_bytes (int): maximum total size of the cached results
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        """
+        Returns the cached result (marking it recently used), or None on a miss
+        """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key: Any, value: Any) -> None:
+        """
+        Caches a result, evicting least recently used results to stay in budget.
+        Results larger than the whole budget are not cached
+        """
+        size = result_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.nbytes -= evicted
+        return
+
+    def get_or_compute(self, key: Any, compute: Callable[[], Any]) -> Any:
+        """
+        Returns the cached result for key, computing and caching it on a miss
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+        return
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters, entry count and bytes in use
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+            }
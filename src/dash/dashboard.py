@@ -1,10 +1,15 @@
 from dash import Input, Output, State, html, Dash, dcc
 from dash import ctx, no_update, callback  # importing dash variables/function
 from dash.dependencies import ALL
-from src.dash.movie_db import MoVIZ
+from src.dash.movie_db import MoVIZ, NUMERIC_COLUMNS
+from src.dash.cache import ResultCache, filter_key
+from src.utils.helpers import DECADE_LABELS, HISTOGRAM_BINS, SCATTER_MAX_POINTS
 import plotly.express as px
 import pandas as pd
 
+# server-side query results, shared by all sessions and keyed by filter hash
+RESULT_CACHE = ResultCache()
+
 
 def run_app() -> None:
     app = Dash(__name__)
@@ -15,9 +20,6 @@ def run_app() -> None:
 
 
 def create_layout(app: Dash):
-    db = MoVIZ()
-    df = db.get_filtered_data()
-
     filter_characteristics = [
         {"label": "Genre", "value": "genre_name"},
         {"label": "Decade", "value": "decade"},
@@ -223,9 +225,8 @@ def generate_filter_widgets(selected, user_filters):
     if not selected:
         return []
 
-    df = MoVIZ().get_filtered_data(
-        **(user_filters or {})
-    )  # widget values are based on filtered data
+    # widget values are based on the filtered data's (memoized) facet statistics
+    facets = MoVIZ().get_facet_stats(selected, **(user_filters or {}))
     widgets = []
 
     if "certificate" in selected:
@@ -263,11 +264,13 @@ def generate_filter_widgets(selected, user_filters):
         )
 
     for col in selected:
-        col_series = df[col].dropna()
+        facet = facets[col]
         user_val = user_filters.get(col) if user_filters else None
 
-        if pd.api.types.is_numeric_dtype(col_series):
-            min_val, max_val = col_series.min(), col_series.max()
+        if facet["kind"] == "numeric":
+            min_val, max_val = facet["min"], facet["max"]
+            if min_val is None:
+                continue
             default_val = (
                 user_val
                 if isinstance(user_val, list) and len(user_val) == 2
@@ -295,7 +298,7 @@ def generate_filter_widgets(selected, user_filters):
                 )
             )
         else:
-            options = sorted(col_series.unique())
+            options = facet["values"]
             dropdown = dcc.Dropdown(
                 id={"type": "filter-dropdown", "index": col},
                 options=[{"label": v, "value": v} for v in options],
@@ -362,26 +365,51 @@ def display_filter_summary(filters):
 
 @callback(Output("filtered-data", "data"), Input("user-filters", "data"))
 def filter_data(filters):
-    db = MoVIZ()
-    return (
-        db.get_filtered_data(**filters).to_dict("records")
-        if filters
-        else db.get_filtered_data().to_dict("records")
+    # only a key travels to the browser; results stay in the server-side cache
+    return filter_key(filters)
+
+
+def cached_query(key: str, filters: dict, query: str, *args):
+    """
+    Runs a MoVIZ aggregate query for the filters behind key, serving repeats
+    from the result cache (the filters recompute it after a miss or eviction)
+    """
+    return RESULT_CACHE.get_or_compute(
+        (key, query, args), lambda: getattr(MoVIZ(), query)(*args, **(filters or {}))
     )
 
 
+HOVER_COLUMNS = ("title", "year", "genre_name", "certificate", "rating")
+AXIS_COLUMNS = [
+    "rating",
+    "worldwide_gross",
+    "production_budget",
+    "decade",
+    "certificate",
+    "genre_name",
+]
+
+
+def order_decades(df: pd.DataFrame, col: str) -> pd.DataFrame:
+    # keeps decade axes chronological instead of alphabetical
+    if col == "decade":
+        df = df.copy()  # results are shared through the cache
+        df[col] = pd.Categorical(
+            df[col], categories=DECADE_LABELS, ordered=True
+        ).remove_unused_categories()
+        df = df.sort_values(col)
+    return df
+
+
 @callback(
     Output("movie-count", "children"),
     Input("filtered-data", "data"),
     Input("x-axis", "value"),
     Input("y-axis", "value"),
+    State("user-filters", "data"),
 )
-def update_movie_count(data, x, y):
-    total = len(data) if data else 0
-    plotted = 0
-    if data and x and y:
-        df = pd.DataFrame(data)
-        plotted = df[[x, y]].dropna().shape[0]
+def update_movie_count(key, x, y, filters):
+    total = cached_query(key, filters, "count_rows") if key else 0
     return f"{total} movies match your filters."
 
 
@@ -391,20 +419,15 @@ def update_movie_count(data, x, y):
     Output("x-axis", "disabled"),
     Output("y-axis", "disabled"),
     Input("filtered-data", "data"),
+    State("user-filters", "data"),
 )
-def update_axis_options(data):
-    if not data:
+def update_axis_options(key, filters):
+    if not key:
+        return [], [], True, True
+    counts = cached_query(key, filters, "count_non_null", tuple(AXIS_COLUMNS))
+    available = [col for col in AXIS_COLUMNS if counts[col] > 0]
+    if not available:
         return [], [], True, True
-    df = pd.DataFrame(data)
-    possible = [
-        "rating",
-        "worldwide_gross",
-        "production_budget",
-        "decade",
-        "certificate",
-        "genre_name",
-    ]
-    available = [col for col in possible if col in df.columns and df[col].notna().any()]
     opts = [{"label": col.replace("_", " ").title(), "value": col} for col in available]
     return opts, opts, False, False
 
@@ -416,19 +439,14 @@ def update_axis_options(data):
     Input("y-axis", "value"),
     State("filtered-data", "data"),
 )
-def validate_axis_selection(x, y, data):
-    if not x or not y or not data:
+def validate_axis_selection(x, y, key):
+    if not x or not y or not key:
         return "", True  # disables button if not ready
     # preventing user from selecting same variable for both axes
     if x == y:
         return f"Invalid Selection: X and Y cannot be the same variable ('{x}').", True
-    df = pd.DataFrame(data)
-    x_type = df[x].dtype
-    y_type = df[y].dtype
     # if x is numeric and y is categorical -> not allowed
-    if pd.api.types.is_numeric_dtype(x_type) and not pd.api.types.is_numeric_dtype(
-        y_type
-    ):
+    if x in NUMERIC_COLUMNS and y not in NUMERIC_COLUMNS:
         warning = f"Invalid Plot Selection: Cannot plot quantitative '{x}' on X with qualitative '{y}' on Y. Please select a different combination."
         return warning, True
     # disables button if both are empty or invalid
@@ -441,61 +459,58 @@ def validate_axis_selection(x, y, data):
     State("filtered-data", "data"),
     State("x-axis", "value"),
     State("y-axis", "value"),
+    State("user-filters", "data"),
 )
-def update_main_graph(_, data, x, y):
-    if not data or not x or not y:
+def update_main_graph(_, key, x, y, filters):
+    if not key or not x or not y:
         return px.scatter(title="Select X and Y axes variables to visualize movie data")
 
-    df = pd.DataFrame(data)
-    x_type = df[x].dtype
-    y_type = df[y].dtype
-
-    if pd.api.types.is_numeric_dtype(x_type) and pd.api.types.is_numeric_dtype(y_type):
-        fig = px.scatter(
-            df,
-            x=x,
-            y=y,
-            hover_data=["title", "year", "genre_name", "certificate", "rating"],
-            labels={x: x.replace("_", " ").title(), y: y.replace("_", " ").title()},
-        )
-        fig.update_layout(
-            title=f"{x.replace('_', ' ').title()} vs {y.replace('_', ' ').title()}"
-        )
-    elif not pd.api.types.is_numeric_dtype(
-        x_type
-    ) and not pd.api.types.is_numeric_dtype(y_type):
-        if x == "decade":
-            order = sorted(df[x].dropna().unique(), key=lambda d: int(d.split("–")[0]))
-            df[x] = pd.Categorical(df[x], categories=order, ordered=True)
-        if y == "decade":
-            order = sorted(df[y].dropna().unique(), key=lambda d: int(d.split("–")[0]))
-            df[y] = pd.Categorical(df[y], categories=order, ordered=True)
-        grouped = df.groupby([x, y]).size().reset_index(name="count")
+    x_label, y_label = x.replace("_", " ").title(), y.replace("_", " ").title()
+    if x in NUMERIC_COLUMNS and y in NUMERIC_COLUMNS:
+        plotted = cached_query(key, filters, "count_non_null", (x, y))
+        if min(plotted.values()) <= SCATTER_MAX_POINTS:
+            df = cached_query(key, filters, "get_points", x, y, HOVER_COLUMNS)
+            fig = px.scatter(
+                df,
+                x=x,
+                y=y,
+                hover_data=list(HOVER_COLUMNS),
+                labels={x: x_label, y: y_label},
+            )
+        else:
+            # too many points to ship; plots SQL-binned counts instead
+            df = cached_query(key, filters, "histogram_2d", x, y)
+            fig = px.density_heatmap(
+                df,
+                x=x,
+                y=y,
+                z="count",
+                histfunc="sum",
+                nbinsx=HISTOGRAM_BINS,
+                nbinsy=HISTOGRAM_BINS,
+                labels={x: x_label, y: y_label, "count": "Count"},
+            )
+        fig.update_layout(title=f"{x_label} vs {y_label}")
+    elif x not in NUMERIC_COLUMNS and y not in NUMERIC_COLUMNS:
+        grouped = cached_query(key, filters, "count_by", (x, y))
+        grouped = order_decades(order_decades(grouped, x), y)
         fig = px.bar(
             grouped,
             x=x,
             y="count",
             color=y,
             barmode="stack",
-            labels={
-                "\
-                             count": "Count",
-                x: x.replace("_", " ").title(),
-                y: y.replace("_", " ").title(),
-            },
-            title=f"{x.replace('_', ' ').title()} by {y.replace('_', ' ').title()}",
+            labels={"count": "Count", x: x_label, y: y_label},
+            title=f"{x_label} by {y_label}",
         )
     else:
-        grouped = df.groupby(x)[y].mean(numeric_only=True).reset_index()
+        grouped = order_decades(cached_query(key, filters, "mean_by", x, y), x)
         fig = px.bar(
             grouped,
             x=x,
             y=y,
-            labels={
-                x: x.replace("_", " ").title(),
-                y: f"Avg {y.replace('_', ' ').title()}",
-            },
-            title=f"Avg {y.replace('_', ' ').title()} by {x.replace('_', ' ').title()}",
+            labels={x: x_label, y: f"Avg {y_label}"},
+            title=f"Avg {y_label} by {x_label}",
         )
         fig.update_layout(xaxis_tickangle=-45)
     return fig
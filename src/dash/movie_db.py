@@ -1,14 +1,47 @@
-from src.database.database import BaseDB
+from src.database.database import BaseDB, MovieDB, FILTER_SOURCE
+from src.dash.cache import ResultCache, filter_key
+from src.utils.helpers import HISTOGRAM_BINS
+import json
 import pandas as pd
 
 MOVIE_DB_PATH = "data/processedmovies.sqlite"
 
+# dashboard column name -> tMovieAnalytics column; also whitelists names sent by the browser
+COLUMNS = {
+    "title": "title",
+    "year": "year",
+    "decade": "decade",
+    "genre_name": "genre_name",
+    "rating": "rating",
+    "certificate": "certificate",
+    "production_budget": "production_budget",
+    "worldwide_gross": "worldwide_gross",
+}
+NUMERIC_COLUMNS = {"year", "rating", "production_budget", "worldwide_gross"}
+# widget domains per (filter key, column); small, so a modest budget holds many
+FACET_CACHE = ResultCache(max_bytes=8 * 1024 * 1024)
+
+
+def _scalar(value):
+    # plain Python values for widget props (None for missing)
+    if pd.isna(value):
+        return None
+    return value.item() if hasattr(value, "item") else value
+
+
+def column_sql(column: str) -> str:
+    """
+    Returns the SQL expression of a dashboard column, rejecting unknown names
+    """
+    if column not in COLUMNS:
+        raise ValueError(f"Unknown column '{column}'")
+    return COLUMNS[column]
+
 
 class MoVIZ(BaseDB):
     def __init__(self):
-        super().__init__(path=MOVIE_DB_PATH, create=True)
-        if not self._existed:
-            pass
+        # read-only: the derived tables are built by the pipeline's load stage
+        super().__init__(path=MOVIE_DB_PATH, create=True, pooled=True)
         return
 
     def get_genre_list(self) -> list:
@@ -16,25 +49,21 @@ class MoVIZ(BaseDB):
         return self.run_query(sql)["genre_name"].tolist()
 
     def get_decade_list(self, genre: str) -> list:
-        sql = """
-        SELECT DISTINCT m.decade
-        FROM tMovie m
-        JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
-        JOIN tGenre g ON mg.genre_id = g.genre_id
-        WHERE g.genre_name = :genre
-        ORDER BY m.decade;
+        sql = f"""
+        SELECT DISTINCT decade
+        {FILTER_SOURCE}
+        WHERE genre_name = :genre
+        ORDER BY decade;
         """
         return self.run_query(sql, {"genre": genre})["decade"].tolist()
 
     def get_title_list(self, genre: str, decade: str) -> list:
-        sql = """
-        SELECT DISTINCT m.normalized_title
-        FROM tMovie m
-        JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
-        JOIN tGenre g ON mg.genre_id = g.genre_id
-        WHERE g.genre_name = :genre
-          AND m.decade = :decade
-        ORDER BY m.normalized_title;
+        sql = f"""
+        SELECT DISTINCT normalized_title
+        {FILTER_SOURCE}
+        WHERE genre_name = :genre
+          AND decade = :decade
+        ORDER BY normalized_title;
         """
         return self.run_query(sql, {"genre": genre, "decade": decade})[
             "normalized_title"
@@ -52,23 +81,17 @@ class MoVIZ(BaseDB):
             WHERE m.normalized_title = :title;
             """
         elif decade:
-            sql = """
-            SELECT b.production_budget AS x, b.worldwide_gross AS y
-            FROM tBudget b
-            JOIN tMovie m ON b.movie_id = m.movie_id
-            JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
-            JOIN tGenre g ON mg.genre_id = g.genre_id
-            WHERE g.genre_name = :genre
-              AND m.decade = :decade;
+            sql = f"""
+            SELECT production_budget AS x, worldwide_gross AS y
+            {FILTER_SOURCE}
+            WHERE genre_name = :genre
+              AND decade = :decade;
             """
         elif genre:
-            sql = """
-            SELECT b.production_budget AS x, b.worldwide_gross AS y
-            FROM tBudget b
-            JOIN tMovie m ON b.movie_id = m.movie_id
-            JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
-            JOIN tGenre g ON mg.genre_id = g.genre_id
-            WHERE g.genre_name = :genre;
+            sql = f"""
+            SELECT production_budget AS x, worldwide_gross AS y
+            {FILTER_SOURCE}
+            WHERE genre_name = :genre;
             """
         else:
             sql = """
@@ -77,64 +100,311 @@ class MoVIZ(BaseDB):
             """
         return self.run_query(sql, params)
 
-    def get_filtered_data(
-        self,
+    @staticmethod
+    def build_where(
         decades: list[str] = None,
         genres: list[str] = None,
         budget_range: list[int] = None,
         revenue_range: list[int] = None,
         ratings_range: list[float] = None,
         certificates: list[str] = None,
-    ) -> pd.DataFrame:
+    ) -> tuple[str, dict]:
+        """
+        Builds the parameterized WHERE clause shared by every filtered query
+        ---
+        Returns:
+            tuple[str, dict]: the clause ('' when unfiltered) and its parameters
+        """
         conditions = []
         params = {}
 
         if decades:
             placeholders = ", ".join([f":decade_{i}" for i in range(len(decades))])
-            conditions.append(f"m.decade IN ({placeholders})")
+            conditions.append(f"decade IN ({placeholders})")
             params.update({f"decade_{i}": val for i, val in enumerate(decades)})
         if genres:
             placeholders = ", ".join([f":genre_{i}" for i in range(len(genres))])
-            conditions.append(f"g.genre_name IN ({placeholders})")
+            conditions.append(f"genre_name IN ({placeholders})")
             params.update({f"genre_{i}": val for i, val in enumerate(genres)})
         if budget_range:
-            conditions.append("b.production_budget BETWEEN :min_budget AND :max_budget")
+            conditions.append("production_budget BETWEEN :min_budget AND :max_budget")
             params["min_budget"] = budget_range[0]
             params["max_budget"] = budget_range[1]
         if revenue_range:
-            conditions.append("b.worldwide_gross BETWEEN :min_gross AND :max_gross")
+            conditions.append("worldwide_gross BETWEEN :min_gross AND :max_gross")
             params["min_gross"] = revenue_range[0]
             params["max_gross"] = revenue_range[1]
         if ratings_range:
-            conditions.append("m.rating BETWEEN :min_rating AND :max_rating")
+            conditions.append("rating BETWEEN :min_rating AND :max_rating")
             params["min_rating"] = ratings_range[0]
             params["max_rating"] = ratings_range[1]
         if certificates:
             placeholders = ", ".join([f":cert_{i}" for i in range(len(certificates))])
-            conditions.append(f"m.certificate IN ({placeholders})")
+            conditions.append(f"certificate IN ({placeholders})")
             params.update({f"cert_{i}": val for i, val in enumerate(certificates)})
 
         where_clause = " AND ".join(conditions)
+        return ("WHERE " + where_clause if where_clause else ""), params
+
+    def get_facet_stats(self, columns: list[str], **filters) -> dict:
+        """
+        Widget domains of the filter columns: min/max for numeric columns and
+        sorted distinct values for categorical ones. Unfiltered domains come
+        from the tFacetStats summary built with the database; filtered ones
+        are SQL aggregates. Both are memoized per filter selection
+        ---
+        Args:
+            columns (list[str]): filter columns (keys of MovieDB.FACETS)
+            **filters: active filters, as accepted by build_where
+        Returns:
+            dict: column -> {'kind', 'min', 'max', 'values'}
+        """
+        key = filter_key(filters)
+        stats = {}
+        missing = []
+        for col in columns:
+            cached = FACET_CACHE.get((key, col))
+            if cached is None:
+                missing.append(col)
+            else:
+                stats[col] = cached
+        if missing:
+            fresh = {}
+            if key == filter_key({}):
+                fresh = self._summary_facets(missing)
+            uncovered = [col for col in missing if col not in fresh]
+            if uncovered:
+                fresh.update(self._query_facets(uncovered, **filters))
+            for col, facet in fresh.items():
+                FACET_CACHE.put((key, col), facet)
+            stats.update(fresh)
+        return stats
+
+    def _summary_facets(self, columns: list[str]) -> dict:
+        # databases built before tFacetStats existed fall back to live queries;
+        # any other SQL error propagates
+        if "tFacetStats" not in self._schema():
+            return {}
+        df = self.run_query(
+            "SELECT * FROM tFacetStats WHERE column_name IN ({});".format(
+                ", ".join("?" for _ in columns)
+            ),
+            tuple(columns),
+        )
+        return {
+            row.column_name: {
+                "kind": row.kind,
+                "min": _scalar(row.min_value),
+                "max": _scalar(row.max_value),
+                "values": (
+                    json.loads(row.distinct_values)
+                    if isinstance(row.distinct_values, str)
+                    else []
+                ),
+            }
+            for row in df.itertuples(index=False)
+        }
+
+    def _query_facets(self, columns: list[str], **filters) -> dict:
+        where, params = self.build_where(**filters)
+        stats = {}
+        numeric = [col for col in columns if MovieDB.FACETS[col] == "numeric"]
+        if numeric:
+            bounds = ", ".join(
+                f"MIN({column_sql(col)}) AS {col}_min, MAX({column_sql(col)}) AS {col}_max"
+                for col in numeric
+            )
+            row = self.run_query(f"SELECT {bounds} {FILTER_SOURCE} {where}", params)
+            row = row.iloc[0]
+            for col in numeric:
+                stats[col] = {
+                    "kind": "numeric",
+                    "min": _scalar(row[f"{col}_min"]),
+                    "max": _scalar(row[f"{col}_max"]),
+                    "values": [],
+                }
+        for col in columns:
+            if col in stats:
+                continue
+            values = self.run_query(
+                f"""
+                SELECT DISTINCT {column_sql(col)} AS value
+                {FILTER_SOURCE}
+                {where} {"AND" if where else "WHERE"} {column_sql(col)} IS NOT NULL
+                ORDER BY value
+                """,
+                params,
+            )["value"].tolist()
+            stats[col] = {
+                "kind": "categorical",
+                "min": None,
+                "max": None,
+                "values": values,
+            }
+        return stats
+
+    def get_filtered_data(self, **filters) -> pd.DataFrame:
+        where, params = self.build_where(**filters)
+        sql = f"""
+        SELECT title, year, decade, genre_name, rating, certificate,
+            production_budget, worldwide_gross
+        {FILTER_SOURCE}
+        {where}
+        """
+        return self.run_query(sql, params)
+
+    def count_rows(self, **filters) -> int:
+        """
+        Counts the movie-genre rows matching the filters
+        """
+        where, params = self.build_where(**filters)
+        sql = f"SELECT COUNT(*) AS n {FILTER_SOURCE} {where}"
+        return int(self.run_query(sql, params)["n"].iloc[0])
+
+    def count_non_null(self, columns: list[str], **filters) -> dict:
+        """
+        Counts the matching rows with a value in each column
+        ---
+        Returns:
+            dict: column -> number of non-null values
+        """
+        where, params = self.build_where(**filters)
+        counts = ", ".join(f"COUNT({column_sql(col)}) AS {col}" for col in columns)
+        sql = f"SELECT {counts} {FILTER_SOURCE} {where}"
+        return {k: int(v) for k, v in self.run_query(sql, params).iloc[0].items()}
+
+    def count_by(self, columns: list[str], **filters) -> pd.DataFrame:
+        """
+        Group-by counts of the matching rows
+        ---
+        Returns:
+            pd.DataFrame: the group columns and 'count'
+        """
+        where, params = self.build_where(**filters)
+        groups = ", ".join(f"{column_sql(col)} AS {col}" for col in columns)
+        not_null = " AND ".join(f"{column_sql(col)} IS NOT NULL" for col in columns)
+        sql = f"""
+        SELECT {groups}, COUNT(*) AS count
+        {FILTER_SOURCE}
+        {where} {"AND" if where else "WHERE"} {not_null}
+        GROUP BY {", ".join(columns)}
+        """
+        return self.run_query(sql, params)
+
+    def mean_by(self, group: str, value: str, **filters) -> pd.DataFrame:
+        """
+        Average of a numeric column per group of the matching rows
+        ---
+        Returns:
+            pd.DataFrame: the group column and the mean of the value column
+        """
+        if value not in NUMERIC_COLUMNS:
+            raise ValueError(f"'{value}' is not a numeric column")
+        where, params = self.build_where(**filters)
+        sql = f"""
+        SELECT {column_sql(group)} AS {group}, AVG({column_sql(value)}) AS {value}
+        {FILTER_SOURCE}
+        {where} {"AND" if where else "WHERE"} {column_sql(group)} IS NOT NULL
+        GROUP BY {group}
+        """
+        return self.run_query(sql, params)
+
+    def _bin_expr(self, column: str, key: str, bins: int) -> str:
+        # bin index from the column range, with the maximum folded into the last bin
+        return (
+            f"MIN(CAST(({column_sql(column)} - :{key}_min) / :{key}_width AS INTEGER),"
+            f" {bins - 1})"
+        )
+
+    def _bin_params(self, column: str, key: str, bins: int, where: str, params: dict):
+        sql = f"""
+        SELECT MIN({column_sql(column)}) AS lo, MAX({column_sql(column)}) AS hi
+        {FILTER_SOURCE} {where}
+        """
+        lo, hi = self.run_query(sql, params).iloc[0]
+        if pd.isna(lo):
+            return None
+        width = (hi - lo) / bins or 1
+        return {f"{key}_min": float(lo), f"{key}_width": float(width)}
+
+    def histogram(self, column: str, bins: int = HISTOGRAM_BINS, **filters):
+        """
+        Equal-width histogram of a numeric column over the matching rows
+        ---
+        Returns:
+            pd.DataFrame: bin 'start', 'end' and 'count' (empty if no values)
+        """
+        if column not in NUMERIC_COLUMNS:
+            raise ValueError(f"'{column}' is not a numeric column")
+        where, params = self.build_where(**filters)
+        edges = self._bin_params(column, "x", bins, where, params)
+        if edges is None:
+            return pd.DataFrame(columns=["start", "end", "count"])
+        sql = f"""
+        SELECT {self._bin_expr(column, "x", bins)} AS bin, COUNT(*) AS count
+        {FILTER_SOURCE}
+        {where} {"AND" if where else "WHERE"} {column_sql(column)} IS NOT NULL
+        GROUP BY bin
+        """
+        df = self.run_query(sql, {**params, **edges})
+        df["start"] = edges["x_min"] + df["bin"] * edges["x_width"]
+        df["end"] = df["start"] + edges["x_width"]
+        return df[["start", "end", "count"]]
+
+    def histogram_2d(self, x: str, y: str, bins: int = HISTOGRAM_BINS, **filters):
+        """
+        Equal-width 2D histogram of two numeric columns over the matching rows
+        ---
+        Returns:
+            pd.DataFrame: x and y bin centres and 'count' (empty if no values)
+        """
+        for column in (x, y):
+            if column not in NUMERIC_COLUMNS:
+                raise ValueError(f"'{column}' is not a numeric column")
+        where, params = self.build_where(**filters)
+        both = f"{column_sql(x)} IS NOT NULL AND {column_sql(y)} IS NOT NULL"
+        scope = f"{where} {'AND' if where else 'WHERE'} {both}"
+        x_edges = self._bin_params(x, "x", bins, scope, params)
+        y_edges = self._bin_params(y, "y", bins, scope, params)
+        if x_edges is None or y_edges is None:
+            return pd.DataFrame(columns=[x, y, "count"])
+        sql = f"""
+        SELECT {self._bin_expr(x, "x", bins)} AS x_bin,
+               {self._bin_expr(y, "y", bins)} AS y_bin,
+               COUNT(*) AS count
+        {FILTER_SOURCE}
+        {scope}
+        GROUP BY x_bin, y_bin
+        """
+        df = self.run_query(sql, {**params, **x_edges, **y_edges})
+        df[x] = x_edges["x_min"] + (df["x_bin"] + 0.5) * x_edges["x_width"]
+        df[y] = y_edges["y_min"] + (df["y_bin"] + 0.5) * y_edges["y_width"]
+        return df[[x, y, "count"]]
+
+    def get_points(
+        self, x: str, y: str, hover: list[str] = None, limit: int = None, **filters
+    ) -> pd.DataFrame:
+        """
+        Matching rows with values for both x and y, plus any hover columns
+        """
+        columns = list(dict.fromkeys([x, y, *(hover or [])]))
+        where, params = self.build_where(**filters)
+        selected = ", ".join(f"{column_sql(col)} AS {col}" for col in columns)
+        both = f"{column_sql(x)} IS NOT NULL AND {column_sql(y)} IS NOT NULL"
         sql = f"""
-        SELECT m.title, m.year, m.decade, g.genre_name, m.rating, m.certificate,
-            b.production_budget, b.worldwide_gross
-        FROM tMovie m
-        JOIN tBudget b ON m.movie_id = b.movie_id
-        JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
-        JOIN tGenre g ON mg.genre_id = g.genre_id
-        {"WHERE " + where_clause if where_clause else ""}
+        SELECT {selected}
+        {FILTER_SOURCE}
+        {where} {"AND" if where else "WHERE"} {both}
+        {f"LIMIT {int(limit)}" if limit else ""}
         """
         return self.run_query(sql, params)
 
     def get_all_data(self) -> pd.DataFrame:
-        sql = """
-        SELECT m.title, m.year, m.decade, m.rating, m.certificate,
-               m.votes, m.runtime, m.production_countries,
-               g.genre_name,
-               b.production_budget, b.domestic_gross, b.worldwide_gross
-        FROM tMovie m
-        JOIN tBudget b ON m.movie_id = b.movie_id
-        JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
-        JOIN tGenre g ON mg.genre_id = g.genre_id
+        sql = f"""
+        SELECT title, year, decade, rating, certificate,
+               votes, runtime, production_countries,
+               genre_name,
+               production_budget, domestic_gross, worldwide_gross
+        {FILTER_SOURCE}
         """
         return self.run_query(sql)
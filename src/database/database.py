@@ -1,19 +1,48 @@
-from src.utils.helpers import MOVIE_DB_PATH
-from src.utils.logging import setup_logger
+from src.utils.helpers import MOVIE_DB_PATH, DB_POOL_SIZE
+from src.utils.logging import setup_logger, ProgressLogger
+from src.database.pool import get_pool, has_pool
 import os
+import json
 import sqlite3
 import pandas as pd
 import numpy as np
 
-
 sqlite3.register_adapter(np.int64, lambda x: int(x))
 
+# one row per movie-genre pair with a budget (the rows the dashboard filters),
+# materialized into tMovieAnalytics after each load with integer surrogate keys
+ANALYTICS_SELECT = """
+        SELECT m.rowid, b.budget_id, g.genre_id,
+               m.title, m.normalized_title, m.year, m.decade, g.genre_name,
+               m.rating, m.certificate, m.votes, m.runtime, m.production_countries,
+               b.production_budget, b.domestic_gross, b.worldwide_gross
+        FROM tMovie m
+        JOIN tBudget b ON m.movie_id = b.movie_id
+        JOIN tMovieGenre mg ON m.movie_id = mg.movie_id
+        JOIN tGenre g ON mg.genre_id = g.genre_id
+"""
+# source of every dashboard query: a single-table scan, no joins
+FILTER_SOURCE = "FROM tMovieAnalytics"
+
 
 class BaseDB:
-    def __init__(self, path: str, create: bool = False):
+    def __init__(
+        self,
+        path: str,
+        create: bool = False,
+        pooled: bool = False,
+        pool_size: int = DB_POOL_SIZE,
+    ):
         self._connected = False
         self.path = os.path.normpath(path)
-        self._existed = self.check_exists(create)
+        self._pool = None
+        # an existing pool means the path was already checked by an earlier instance
+        if pooled and has_pool(self.path):
+            self._existed = True
+        else:
+            self._existed = self.check_exists(create)
+        if pooled:
+            self._pool = get_pool(self.path, size=pool_size)
         return
 
     def run_query(
@@ -23,6 +52,12 @@ class BaseDB:
         commit: bool = False,
         keep_open: bool = False,
     ) -> pd.DataFrame:
+        if self._pool is not None and not self._connected:
+            with self._pool.reader() as conn:
+                try:
+                    return pd.read_sql(sql, conn, params=params)
+                except Exception as e:
+                    raise type(e)(f"sql: {sql}\nparams: {params}") from e
         self._connect()
         try:
             results = pd.read_sql(sql, self._conn, params=params)
@@ -39,6 +74,17 @@ class BaseDB:
         commit: bool = False,
         keep_open: bool = False,
     ) -> int:
+        if self._pool is not None and not self._connected:
+            with self._pool.writer(commit=commit) as conn:
+                try:
+                    curs = (
+                        conn.execute(sql)
+                        if params is None
+                        else conn.execute(sql, params)
+                    )
+                except Exception as e:
+                    raise type(e)(f"sql: {sql}\nparams: {params}") from e
+                return curs.lastrowid
         if not self._connected:
             self._connect()
         try:
@@ -54,6 +100,19 @@ class BaseDB:
             self._close()
         return self._curs.lastrowid
 
+    def _schema(self) -> set:
+        """
+        Returns the names of the tables and indexes in the database
+        """
+        sql = "SELECT name FROM sqlite_master WHERE type IN ('table', 'index');"
+        return set(self.run_query(sql)["name"])
+
+    def pool_stats(self) -> dict:
+        """
+        Returns hit/miss metrics of the shared connection pool (empty if unpooled)
+        """
+        return self._pool.stats() if self._pool is not None else {}
+
     def _connect(self, foreign_keys: bool = True) -> None:
         # print('connected to database')
         # curframe = inspect.currentframe()
@@ -98,22 +157,86 @@ class BaseDB:
 
 class MovieDB(BaseDB):
     PATH = MOVIE_DB_PATH
+    CHUNK_SIZE = 50_000
+    # relaxed durability for the load window (restored afterwards)
+    BULK_LOAD_PRAGMAS = {
+        "journal_mode": "MEMORY",
+        "synchronous": "OFF",
+        "cache_size": -200_000,  # negative = KiB, ~200MB page cache
+    }
+    # index name -> "table(columns)", built after the tables (and after bulk loads)
+    INDEXES = {
+        "idx_budget_movie_id": "tBudget(movie_id)",
+        "idx_moviegenre_movie_id": "tMovieGenre(movie_id)",
+        "idx_moviegenre_genre_id": "tMovieGenre(genre_id)",
+        "idx_genre_name": "tGenre(genre_name)",
+        "idx_movie_decade": "tMovie(decade)",
+        "idx_movie_normalized_title": "tMovie(normalized_title)",
+    }
+    # built after tMovieAnalytics is materialized: one composite index led by
+    # each filter predicate, carrying the other filter columns so filtered
+    # counts, group-bys and facets are answered from the index alone
+    ANALYTICS_INDEXES = {
+        "idx_analytics_genre_decade": "tMovieAnalytics(genre_name, decade, certificate, rating, production_budget, worldwide_gross)",
+        "idx_analytics_decade_genre": "tMovieAnalytics(decade, genre_name, certificate, rating, production_budget, worldwide_gross)",
+        "idx_analytics_certificate": "tMovieAnalytics(certificate, rating, production_budget, worldwide_gross)",
+        "idx_analytics_rating": "tMovieAnalytics(rating, production_budget, worldwide_gross)",
+        "idx_analytics_budget": "tMovieAnalytics(production_budget, worldwide_gross, rating)",
+        "idx_analytics_gross": "tMovieAnalytics(worldwide_gross, production_budget, rating)",
+        "idx_analytics_normalized_title": "tMovieAnalytics(normalized_title)",
+    }
+    # dashboard filter predicates whose plans must use an index (EXPLAIN QUERY PLAN)
+    PLAN_CHECKS = {
+        "genre": "genre_name IN (?, ?)",
+        "decade": "decade IN (?, ?)",
+        "genre_decade": "genre_name IN (?) AND decade IN (?)",
+        "certificate": "certificate IN (?, ?)",
+        "rating": "rating BETWEEN ? AND ?",
+        "budget": "production_budget BETWEEN ? AND ?",
+        "gross": "worldwide_gross BETWEEN ? AND ?",
+        "certificate_rating": "certificate IN (?) AND rating BETWEEN ? AND ?",
+        "budget_gross": "production_budget BETWEEN ? AND ? AND worldwide_gross BETWEEN ? AND ?",
+    }
+    # tMovieAnalytics columns summarized into tFacetStats: name -> kind
+    FACETS = {
+        "genre_name": "categorical",
+        "decade": "categorical",
+        "certificate": "categorical",
+        "rating": "numeric",
+        "production_budget": "numeric",
+        "worldwide_gross": "numeric",
+    }
+
+    # rebuilt from the base tables by every load (see _create_derived_tables)
+    DERIVED_TABLES = ["tMovieAnalytics", "tFacetStats"]
 
-    def __init__(self, path: str = PATH, create: bool = False):
+    def __init__(self, path: str = PATH, create: bool = False, build: bool = False):
         """
         Initializing the MovieDB class and optionally creating schema if not previously existing
+        In build mode only the tables are created; indexes are built after the bulk load
         """
         self.logger = setup_logger("MovieDB", "database")
         super().__init__(self.PATH, create=True)
         if not self._existed:
             self.logger.info("Database not found. Creating schema")
             self._create_tables()
+            if not build:
+                self._create_indexes()
         else:
             self.logger.info("Database already exists. Using existing schema")
 
+    def missing_schema(self) -> list[str]:
+        """
+        Returns the derived tables and analytics indexes a load with the current
+        code builds but the database lacks (such databases need a new load)
+        """
+        schema = self._schema()
+        expected = self.DERIVED_TABLES + list(self.ANALYTICS_INDEXES)
+        return [name for name in expected if name not in schema]
+
     def _create_tables(self) -> None:
         """
-        Creates tables and indexes necessary for MoVIZ
+        Creates the tables necessary for MoVIZ (indexes are a separate phase)
         """
         self.logger.info("Creating tables")
 
@@ -157,17 +280,84 @@ class MovieDB(BaseDB):
                 worldwide_gross INTEGER,
                 FOREIGN KEY (movie_id) REFERENCES tMovie(movie_id)
             );""")
-        # creating additional indices for faster queries
-        self.run_action(
-            "CREATE INDEX IF NOT EXISTS idx_budget_movie_id ON tBudget(movie_id);"
-        )
-        self.run_action(
-            "CREATE INDEX IF NOT EXISTS idx_moviegenre_movie_id ON tMovieGenre(movie_id);"
-        )
-        self.run_action(
-            "CREATE INDEX IF NOT EXISTS idx_moviegenre_genre_id ON tMovieGenre(genre_id);"
-        )
-        self.logger.info("Tables and indexes successfully created")
+        self._create_derived_tables()
+        self.logger.info("Tables successfully created")
+        return
+
+    def _create_derived_tables(self, keep_open: bool = False) -> None:
+        """
+        Creates the tables rebuilt from the base tables after each load
+        ---
+        Args:
+            keep_open (bool): keeps the current connection open afterwards
+        """
+        if not self._connected:
+            self._connect()
+        # tMovieAnalytics Table (denormalized movie-genre-budget rows)
+        self._curs.execute("""
+            CREATE TABLE IF NOT EXISTS tMovieAnalytics (
+                movie_key INTEGER NOT NULL,
+                budget_key INTEGER NOT NULL,
+                genre_id INTEGER NOT NULL,
+                title TEXT,
+                normalized_title TEXT,
+                year INTEGER,
+                decade TEXT,
+                genre_name TEXT,
+                rating REAL,
+                certificate TEXT,
+                votes INTEGER,
+                runtime INTEGER,
+                production_countries TEXT,
+                production_budget INTEGER,
+                domestic_gross INTEGER,
+                worldwide_gross INTEGER
+            );""")
+        # tFacetStats Table (filter widget domains)
+        self._curs.execute("""
+            CREATE TABLE IF NOT EXISTS tFacetStats (
+                column_name TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                min_value,
+                max_value,
+                distinct_count INTEGER,
+                distinct_values TEXT
+            );""")
+        if not keep_open:
+            self._close()
+        return
+
+    def _create_indexes(self, keep_open: bool = False) -> None:
+        """
+        Creates the indexes in INDEXES (run after bulk loads in build mode)
+        ---
+        Args:
+            keep_open (bool): keeps the current connection open afterwards
+        """
+        self.logger.info("Creating indexes")
+        if not self._connected:
+            self._connect()
+        for name, target in self.INDEXES.items():
+            self._curs.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target};")
+        if not keep_open:
+            self._close()
+        self.logger.info("Indexes successfully created")
+        return
+
+    def _drop_indexes(self, keep_open: bool = False) -> None:
+        """
+        Drops the indexes in INDEXES so bulk inserts skip index maintenance
+        ---
+        Args:
+            keep_open (bool): keeps the current connection open afterwards
+        """
+        if not self._connected:
+            self._connect()
+        for name in self.INDEXES:
+            self._curs.execute(f"DROP INDEX IF EXISTS {name};")
+        if not keep_open:
+            self._close()
+        self.logger.info("Dropped indexes ahead of bulk load")
         return
 
     def load_from_dataframes(
@@ -176,19 +366,33 @@ class MovieDB(BaseDB):
         budgets_df: pd.DataFrame,
         genre_table: pd.DataFrame,
         movie_genre_links: pd.DataFrame,
+        chunk_size: int = CHUNK_SIZE,
+        defer_indexes: bool = True,
     ) -> None:
         """
         Loads cleaned and merged DataFrames directory into SQLite database
+        Rows are streamed in chunks through executemany inside a single transaction,
+        with the bulk load PRAGMAs applied for the duration of the load
+        With defer_indexes, indexes are dropped before the inserts, rebuilt
+        afterwards, and ANALYZE refreshes the query planner statistics
         ---
         Args:
             movies_df (pd.DataFrame): main movie metadata table
             budgets_df (pd.DataFrame): budgets and gross earnings table
             genre_table (pd.DataFrame): genre lookup table
             movie_genre_links (pd.DataFrame): pivot table linking movies and genres
+            chunk_size (int): number of rows sent to each executemany call
+            defer_indexes (bool): builds the indexes after the data is inserted
         """
         self.logger.info("Beginning data insertion into MoVIZ database")
         self._connect()
+        saved_pragmas = self._apply_pragmas(self.BULK_LOAD_PRAGMAS)
+        # explicit transaction control for the whole load window
+        self._conn.isolation_level = None
         try:
+            self._curs.execute("BEGIN;")
+            if defer_indexes:
+                self._drop_indexes(keep_open=True)
             # inserting into tMovies
             movie_cols = [
                 "movie_id",
@@ -205,9 +409,7 @@ class MovieDB(BaseDB):
                 "production_countries",
             ]
             movie_sql = f"INSERT OR IGNORE INTO tMovie VALUES ({','.join(['?'] * len(movie_cols))})"
-            for row in movies_df[movie_cols].itertuples(index=False, name=None):
-                self._curs.execute(movie_sql, row)
-                self.logger.info(f"Inserted {len(movies_df)} rows into tMovie")
+            self._bulk_insert("tMovie", movie_sql, movies_df, movie_cols, chunk_size)
 
             # inserting into tBudgets
             budget_cols = [
@@ -221,36 +423,198 @@ class MovieDB(BaseDB):
                 movie_id, production_budget, domestic_gross, worldwide_gross
             ) VALUES (?, ?, ?, ?)
             """
-            for row in budgets_df[budget_cols].itertuples(index=False, name=None):
-                self._curs.execute(budget_sql, row)
-            self.logger.info(f"Inserted {len(budgets_df)} rows into tBudget")
+            self._bulk_insert(
+                "tBudget", budget_sql, budgets_df, budget_cols, chunk_size
+            )
 
             # inserting into tGenre
             genre_sql = (
                 "INSERT OR IGNORE INTO tGenre (genre_id, genre_name) VALUES (?, ?)"
             )
-            for row in genre_table[["genre_id", "genre_name"]].itertuples(
-                index=False, name=None
-            ):
-                self._curs.execute(genre_sql, row)
-            self.logger.info(f"Inserted {len(genre_table)} rows into tGenre")
+            self._bulk_insert(
+                "tGenre", genre_sql, genre_table, ["genre_id", "genre_name"], chunk_size
+            )
 
             # inserting into tMovieGenre
             link_sql = (
                 "INSERT OR IGNORE INTO tMovieGenre (movie_id, genre_id) VALUES (?, ?)"
             )
-            for row in movie_genre_links[["movie_id", "genre_id"]].itertuples(
-                index=False, name=None
-            ):
-                self._curs.execute(link_sql, row)
-            self.logger.info(f"Inserted {len(movie_genre_links)} rows into tMovieGenre")
+            self._bulk_insert(
+                "tMovieGenre",
+                link_sql,
+                movie_genre_links,
+                ["movie_id", "genre_id"],
+                chunk_size,
+            )
 
-            self._conn.commit()
+            if defer_indexes:
+                self._create_indexes(keep_open=True)
+            self._materialize_analytics(keep_open=True)
+            self._build_facet_stats(keep_open=True)
+            self._curs.execute("COMMIT;")
             self.logger.info("All data successfully committed")
+            self._curs.execute("ANALYZE;")
+            self.logger.info("Planner statistics refreshed with ANALYZE")
+            self.check_query_plans(keep_open=True)
         except Exception as e:
             self.logger.error("Rolling back. Error occured during insertion")
-            self._conn.rollback()
+            if self._conn.in_transaction:
+                self._curs.execute("ROLLBACK;")
             raise e
         finally:
+            self._apply_pragmas(saved_pragmas)
             self._close()
             self.logger.info("Database connection closed")
+
+    def check_query_plans(self, keep_open: bool = False) -> list[str]:
+        """
+        Runs EXPLAIN QUERY PLAN on each dashboard filter predicate in
+        PLAN_CHECKS and warns about any that fall back to a full table scan
+        ---
+        Args:
+            keep_open (bool): keeps the current connection open afterwards
+        Returns:
+            list[str]: names of the checks whose plan scans tMovieAnalytics
+        """
+        if not self._connected:
+            self._connect()
+        full_scans = []
+        for name, predicate in self.PLAN_CHECKS.items():
+            sql = f"SELECT COUNT(*) {FILTER_SOURCE} WHERE {predicate}"
+            params = [None] * predicate.count("?")
+            plan = [
+                row[-1]
+                for row in self._curs.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+            ]
+            # a SCAN (even of a covering index) reads every row; SEARCH seeks
+            if any(step.startswith("SCAN tMovieAnalytics") for step in plan):
+                full_scans.append(name)
+                self.logger.warning(
+                    f"Filter '{name}' ({predicate}) scans tMovieAnalytics: {plan}"
+                )
+        if not keep_open:
+            self._close()
+        if not full_scans:
+            self.logger.info(f"All {len(self.PLAN_CHECKS)} filter plans use an index")
+        return full_scans
+
+    def _materialize_analytics(self, keep_open: bool = False) -> None:
+        """
+        Rebuilds tMovieAnalytics from the base tables: one row per movie-genre
+        pair with a budget, carrying every column the dashboard filters or
+        plots, keyed by integer surrogates (tMovie rowid, budget_id, genre_id)
+        ---
+        Args:
+            keep_open (bool): keeps the current connection open afterwards
+        """
+        if not self._connected:
+            self._connect()
+        for name in self.ANALYTICS_INDEXES:
+            self._curs.execute(f"DROP INDEX IF EXISTS {name};")
+        self._curs.execute("DELETE FROM tMovieAnalytics;")
+        self._curs.execute(f"INSERT INTO tMovieAnalytics {ANALYTICS_SELECT};")
+        rows = self._curs.execute("SELECT COUNT(*) FROM tMovieAnalytics;").fetchone()[0]
+        for name, target in self.ANALYTICS_INDEXES.items():
+            self._curs.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target};")
+        if not keep_open:
+            self._close()
+        self.logger.info(f"Materialized tMovieAnalytics with {rows} rows")
+        return
+
+    def _build_facet_stats(self, keep_open: bool = False) -> None:
+        """
+        Summarizes each filter column of tMovieAnalytics into tFacetStats:
+        min/max for numeric columns, sorted distinct values (JSON) for
+        categorical ones, so widgets never scan the table at request time
+        ---
+        Args:
+            keep_open (bool): keeps the current connection open afterwards
+        """
+        if not self._connected:
+            self._connect()
+        # databases created before tFacetStats existed get it here
+        self._create_derived_tables(keep_open=True)
+        self._curs.execute("DELETE FROM tFacetStats;")
+        for name, kind in self.FACETS.items():
+            if kind == "numeric":
+                row = self._curs.execute(
+                    f"SELECT MIN({name}), MAX({name}), COUNT(DISTINCT {name}) "
+                    f"{FILTER_SOURCE}"
+                ).fetchone()
+                values = None
+            else:
+                values = [
+                    value
+                    for (value,) in self._curs.execute(
+                        f"SELECT DISTINCT {name} {FILTER_SOURCE} "
+                        f"WHERE {name} IS NOT NULL ORDER BY {name}"
+                    )
+                ]
+                row = (None, None, len(values))
+            self._curs.execute(
+                "INSERT INTO tFacetStats VALUES (?, ?, ?, ?, ?, ?)",
+                (name, kind, *row, None if values is None else json.dumps(values)),
+            )
+        if not keep_open:
+            self._close()
+        self.logger.info(f"Facet statistics built for {len(self.FACETS)} columns")
+        return
+
+    def _bulk_insert(
+        self,
+        table: str,
+        sql: str,
+        df: pd.DataFrame,
+        cols: list,
+        chunk_size: int = CHUNK_SIZE,
+    ) -> int:
+        """
+        Streams the target columns of a DataFrame into a table in chunks via executemany
+        ---
+        Args:
+            table (str): name of the target table (for logging)
+            sql (str): parameterized INSERT statement
+            df (pd.DataFrame): source DataFrame
+            cols (list): columns to insert, in placeholder order
+            chunk_size (int): number of rows per executemany call
+        Returns:
+            int: number of rows sent to the database
+        """
+        progress = ProgressLogger(self.logger, f"{table} insert", total=len(df))
+        for chunk in iter_row_chunks(df[cols], chunk_size):
+            self._curs.executemany(sql, chunk)
+            progress.update(len(chunk))
+        progress.finish()
+        return progress.count
+
+    def _apply_pragmas(self, pragmas: dict) -> dict:
+        """
+        Sets PRAGMAs on the open connection and returns their previous values
+        ---
+        Args:
+            pragmas (dict): PRAGMA names mapped to the values to set
+        Returns:
+            dict: PRAGMA names mapped to the values they had before
+        """
+        previous = {}
+        for name, value in pragmas.items():
+            previous[name] = self._curs.execute(f"PRAGMA {name};").fetchone()[0]
+            self._curs.execute(f"PRAGMA {name}={value};")
+        return previous
+
+
+def iter_row_chunks(df: pd.DataFrame, chunk_size: int):
+    """
+    Yields DataFrame rows as lists of tuples, chunk_size rows at a time,
+    with missing values converted to None for SQLite
+    ---
+    Args:
+        df (pd.DataFrame): source DataFrame
+        chunk_size (int): maximum number of rows per chunk
+    Yields:
+        list[tuple]: rows ready for executemany
+    """
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start : start + chunk_size].astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield list(chunk.itertuples(index=False, name=None))
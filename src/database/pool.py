@@ -0,0 +1,171 @@
+from src.utils.helpers import DB_POOL_SIZE
+from contextlib import contextmanager
+import os
+import queue
+import sqlite3
+import threading
+
+# seconds between checks for a free connection while the pool is exhausted
+CHECKOUT_WAIT = 0.1
+
+
+class ConnectionPool:
+    """
+    Thread-safe SQLite connection pool for a single database file. Read
+    connections (WAL mode, so readers never block each other or the writer)
+    are checked out of a shared queue and returned after use, so any thread
+    reuses them and at most 'size' are ever open; all writes go through one
+    shared writer connection guarded by a lock.
+    """
+
+    def __init__(self, path: str, size: int = DB_POOL_SIZE):
+        self.path = os.path.normpath(path)
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._idle = queue.Queue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = None
+        # bumped by close() so connections checked out before it are discarded
+        self._generation = 0
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread is off so connections can move between request threads
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA foreign_keys=OFF;")
+        return conn
+
+    def _checkout(self) -> tuple[int, sqlite3.Connection]:
+        while True:
+            try:
+                generation, conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    if self._opened < self.size:
+                        self._opened += 1
+                        self.misses += 1
+                        generation = self._generation
+                        break
+                try:
+                    # pool exhausted: waits for another thread to return a connection
+                    generation, conn = self._idle.get(timeout=CHECKOUT_WAIT)
+                except queue.Empty:
+                    continue
+            with self._lock:
+                if generation == self._generation:
+                    self.hits += 1
+                    return generation, conn
+            conn.close()
+        try:
+            return generation, self._open()
+        except Exception:
+            with self._lock:
+                if generation == self._generation:
+                    self._opened -= 1
+            raise
+
+    def _checkin(self, generation: int, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if generation == self._generation:
+                self._idle.put((generation, conn))
+                return
+        conn.close()
+        return
+
+    @contextmanager
+    def reader(self):
+        """
+        Checks a read connection out of the pool, opening one while fewer than
+        'size' exist and otherwise waiting for one to be returned. The
+        connection goes back to the pool when the block exits.
+        """
+        generation, conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._checkin(generation, conn)
+
+    @contextmanager
+    def writer(self, commit: bool = True):
+        """
+        Yields the single writer connection while holding the write lock.
+        Commits on success (or rolls back when commit is False) and rolls back on error.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open()
+            try:
+                yield self._writer
+            except Exception:
+                self._writer.rollback()
+                raise
+            if commit:
+                self._writer.commit()
+            else:
+                self._writer.rollback()
+
+    def stats(self) -> dict:
+        """
+        Returns the pool hit/miss counters and the number of open read connections
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "open_readers": self._opened,
+                "size": self.size,
+            }
+
+    def close(self) -> None:
+        """
+        Closes every idle pooled connection; connections checked out at the
+        time are closed when returned, and the pool reopens on the next query
+        """
+        with self._lock:
+            while True:
+                try:
+                    _, conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+            self._opened = 0
+            self._generation += 1
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        return
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(path: str, size: int = DB_POOL_SIZE) -> ConnectionPool:
+    """
+    Returns the shared pool for a database path, creating it on first use
+    ---
+    Args:
+        path (str): path to the SQLite database file
+        size (int): maximum number of open read connections (first call only)
+    Returns:
+        ConnectionPool: the pool for that path
+    """
+    key = os.path.normpath(path)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(key, size=size)
+        return _pools[key]
+
+
+def has_pool(path: str) -> bool:
+    """
+    Returns True if a pool has already been created for the database path
+    """
+    with _pools_lock:
+        return os.path.normpath(path) in _pools
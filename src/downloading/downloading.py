@@ -1,9 +1,34 @@
 ## DOWNLOADS THE DATASETS FROM KAGGLE VIA KAGGLEHUB ##
 import os
+import json
 import shutil
+import filecmp
 import kagglehub
 from src.utils.logging import setup_logger
 
+# records which Kaggle dataset version the CSVs in an output directory came from
+VERSION_MARKER = ".kaggle_version.json"
+
+
+def dataset_version(download_path: str) -> str | None:
+    """
+    Returns the dataset version kagglehub downloaded, read from its cache path
+    (e.g., '.../datasets/owner/name/versions/3' -> '3')
+    """
+    parent, leaf = os.path.split(os.path.normpath(download_path))
+    return leaf if os.path.basename(parent) == "versions" else None
+
+
+def read_version_marker(output_dir: str) -> dict | None:
+    """
+    Returns the version marker of a downloaded dataset, or None if it has none
+    """
+    try:
+        with open(os.path.join(output_dir, VERSION_MARKER)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
 
 def download_kaggle_dataset(
     kaggle_id: str,
@@ -15,6 +40,11 @@ def download_kaggle_dataset(
     """
     Downloads a dataset from Kaggle and saves all CSVs to an output directory.
     Saves the logging progress.
+    kagglehub resolves the latest published version on every call (and only
+    downloads versions it has not cached), so a new upstream version is picked
+    up on the next run. Only CSVs whose contents differ from the local copy
+    are replaced, which leaves unchanged inputs (and the stages cleaning them)
+    untouched. If Kaggle cannot be reached, an existing local copy is kept
     ---
     Args:
         kaggle_id (str): Kaggle dataset identifier (e.g., "username/dataset-name")
@@ -25,8 +55,19 @@ def download_kaggle_dataset(
     logger = setup_logger(logger_name, log_filepath)
     logger.info(f"Downloading dataset '{kaggle_id}' to {output_dir}")
 
-    download_path = kagglehub.dataset_download(kaggle_id)
-    logger.info("Download complete")
+    marker = read_version_marker(output_dir)
+    try:
+        download_path = kagglehub.dataset_download(kaggle_id)
+    except Exception as e:
+        if marker is None:
+            raise
+        logger.warning(
+            f"Could not check '{kaggle_id}' for updates ({e}). "
+            f"Keeping local version {marker.get('version')}"
+        )
+        return
+    version = dataset_version(download_path)
+    logger.info(f"Download complete (version {version})")
 
     os.makedirs(output_dir, exist_ok=True)
     csv_files = [file for file in os.listdir(download_path) if file.endswith(".csv")]
@@ -37,9 +78,14 @@ def download_kaggle_dataset(
         dst_name = target_filename if (target_filename and i == 0) else file
         dst = os.path.join(output_dir, dst_name)
 
-        if not os.path.exists(dst):
+        if not os.path.exists(dst) or not filecmp.cmp(src, dst, shallow=False):
             shutil.copy(src, dst)
             logger.info(f"Copied {file} → {dst}")
         else:
-            logger.info(f"Skipped {file}. Already exists")
+            logger.info(f"Skipped {file}. Already up to date")
+
+    with open(os.path.join(output_dir, VERSION_MARKER), "w") as f:
+        json.dump({"kaggle_id": kaggle_id, "version": version}, f, indent=2)
+    if marker is not None and marker.get("version") != version:
+        logger.info(f"Updated '{kaggle_id}' from version {marker.get('version')}")
     return
@@ -1,86 +1,401 @@
 import os
+import json
 import time
+import hashlib
+import threading
 import requests
 import pandas as pd
-from io import StringIO
+from io import BytesIO
+from lxml import etree
 from tqdm import tqdm
-from src.utils.helpers import BUDGET_RAW_FILE
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from src.utils.helpers import BUDGET_RAW_FILE, BUDGET_PAGE_CACHE_PATH
 from src.utils.logging import setup_logger
+from src.processing.cleaner_tools import parse_money
 
 # dummy headers
 headers = {"User-Agent": "Mozilla/5.0"}
 logger = setup_logger("budget_scraper", "webscrape_budgets")
 
+# scraping settings
+BUDGETS_URL = "https://www.the-numbers.com/movie/budgets/all"
+MAX_WORKERS = 4
+REQUESTS_PER_SECOND = 2.0
+MAX_RETRIES = 3
+MONEY_COLUMNS = ["Production Budget", "Domestic Gross", "Worldwide Gross"]
 
-def clean_money(value: int) -> int | None:
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that caps the request rate shared by all workers
+    ---
+    Args:
+        rate (float): tokens added per second (sustained requests per second)
+        capacity (int): maximum tokens held (burst size)
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Blocks until a token is available and consumes it
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(
+    pool_size: int = MAX_WORKERS, retries: int = MAX_RETRIES
+) -> requests.Session:
     """
-    Converts currency strings to ints by removing symbols($) and reformatting
+    Creates a keep-alive session whose connection pool fits all workers and
+    which retries failed or throttled GETs with exponential backoff
     ---
-    Args: value (int) is the string value of the money amount
-    Returns: the (int) value of the money amount or None if string was empty
+    Args:
+        pool_size (int): number of pooled connections per host
+        retries (int): maximum number of retries per request
+    Returns:
+        requests.Session: configured session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=1.0,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.headers.update(headers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def page_url(base_url: str, start: int) -> str:
+    """
+    Builds the URL of the 100-row page beginning at row 'start'
+    """
+    return base_url if start == 0 else f"{base_url}/{start + 1}"
+
+
+def _cache_files(cache_dir: str, url: str) -> tuple[str, str]:
+    """
+    Returns the (html, metadata) cache file paths for a URL
     """
+    key = hashlib.sha1(url.encode("utf-8")).hexdigest()
     return (
-        int(value.replace("$", "").replace(",", "").replace("\xa0", "").strip())
-        if value.strip()
-        else None
+        os.path.join(cache_dir, f"{key}.html"),
+        os.path.join(cache_dir, f"{key}.json"),
+    )
+
+
+def read_cached_page(cache_dir: str, url: str) -> dict | None:
+    """
+    Loads a cached page and its validators (ETag/Last-Modified)
+    ---
+    Args:
+        cache_dir (str): page cache directory
+        url (str): page URL
+    Returns:
+        dict: {'html', 'etag', 'last_modified'} or None if the page is not cached
+    """
+    html_path, meta_path = _cache_files(cache_dir, url)
+    if not (os.path.exists(html_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    with open(html_path, encoding="utf-8") as f:
+        meta["html"] = f.read()
+    return meta
+
+
+def write_cached_page(cache_dir: str, url: str, page: dict) -> None:
+    """
+    Stores a page's HTML and validators in the page cache
+    ---
+    Args:
+        cache_dir (str): page cache directory
+        url (str): page URL
+        page (dict): {'html', 'etag', 'last_modified'} as returned by fetch_page
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    html_path, meta_path = _cache_files(cache_dir, url)
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(page["html"])
+    with open(meta_path, "w") as f:
+        json.dump(
+            {
+                "url": url,
+                "etag": page.get("etag"),
+                "last_modified": page.get("last_modified"),
+            },
+            f,
+        )
+    return
+
+
+def fetch_page(
+    session: requests.Session,
+    url: str,
+    bucket: TokenBucket,
+    cache_dir: str = None,
+    timeout: float = 30,
+) -> tuple[dict, bool]:
+    """
+    Fetches a single page once the rate limiter allows it. With a cache_dir,
+    issues a conditional GET and serves the cached HTML on 304 Not Modified.
+    Changed pages are not cached here: the caller caches them with
+    write_cached_page once their rows are saved, so a crash in between never
+    leaves a page that revalidates as unchanged but whose rows were lost
+    ---
+    Args:
+        session (requests.Session): shared session
+        url (str): page URL
+        bucket (TokenBucket): shared rate limiter
+        cache_dir (str): page cache directory (None disables caching)
+        timeout (float): request timeout in seconds
+    Returns:
+        tuple[dict, bool]: the page ({'html', 'etag', 'last_modified'}) and
+        whether it changed since it was cached
+    """
+    cached = read_cached_page(cache_dir, url) if cache_dir else None
+    conditional = {}
+    if cached and cached.get("etag"):
+        conditional["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        conditional["If-Modified-Since"] = cached["last_modified"]
+
+    bucket.acquire()
+    logger.info(f"Scraping URL: {url}")
+    response = session.get(url, headers=conditional, timeout=timeout)
+    if response.status_code == 304 and cached:
+        logger.info(f"Not modified: {url}")
+        return cached, False
+    response.raise_for_status()
+    page = {
+        "html": response.text,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return page, True
+
+
+def row_hashes(df: pd.DataFrame) -> pd.Series:
+    """
+    Hashes budget rows on their values (ignoring the page 'Index') so scraped
+    rows can be compared against rows already saved to CSV
+    """
+    normalized = df[["Release Date", "Movie", *MONEY_COLUMNS]].astype(
+        {"Release Date": str, "Movie": str, **{col: "Int64" for col in MONEY_COLUMNS}}
+    )
+    return pd.util.hash_pandas_object(normalized, index=False)
+
+
+def _cell_text(cell) -> str:
+    # joins text nodes with spaces so '<br>'-split headers read 'Production Budget'
+    return " ".join(
+        part.replace("\xa0", " ").strip()
+        for part in cell.itertext()
+        if part.replace("\xa0", " ").strip()
+    )
+
+
+def parse_budget_page(html: str) -> pd.DataFrame | None:
+    """
+    Parses the budget table of a The-Numbers page into a DataFrame
+    Streams the page through lxml's iterparse and stops at the end of the
+    budget table, collecting cell text straight into per-column lists
+    ---
+    Args:
+        html (str): the page HTML
+    Returns:
+        pd.DataFrame: budget rows indexed by 'Index', or None if no table was found
+    """
+    header = None
+    columns = None
+    # the text is re-encoded here, so lxml is told the encoding rather than
+    # guessing it (pages without a <meta charset> would decode as Latin-1)
+    events = etree.iterparse(
+        BytesIO(html.encode("utf-8")),
+        events=("end",),
+        tag=("tr", "table"),
+        html=True,
+        encoding="utf-8",
     )
+    for _, elem in events:
+        if elem.tag == "table":
+            if columns and columns[0]:
+                break
+            # not the budget table, keep looking
+            header, columns = None, None
+            continue
+        cells = [child for child in elem if child.tag in ("td", "th")]
+        if header is None:
+            if cells and all(cell.tag == "th" for cell in cells):
+                header = [_cell_text(cell) for cell in cells]
+                if "Movie" in header:
+                    columns = [[] for _ in header]
+                else:
+                    header = None
+        elif len(cells) == len(header):
+            for values, cell in zip(columns, cells):
+                values.append("".join(cell.itertext()).strip())
+        elem.clear()
+    if not columns or not columns[0]:
+        return None
+
+    header[0] = "Index"
+    data = dict(zip(header, columns))
+    df = pd.DataFrame(
+        {
+            col: (
+                parse_money(values)
+                if col in MONEY_COLUMNS
+                else pd.Series(values, dtype=str)
+            )
+            for col, values in data.items()
+        }
+    )
+    df["Index"] = pd.to_numeric(df["Index"], errors="coerce").astype("Int64")
+    return df.set_index("Index")
 
 
 def webscrape_budgets(
     budget_path: str = BUDGET_RAW_FILE,
     max_pages: int = 1,
+    base_url: str = BUDGETS_URL,
+    max_workers: int = MAX_WORKERS,
+    requests_per_second: float = REQUESTS_PER_SECOND,
+    cache_dir: str = BUDGET_PAGE_CACHE_PATH,
+    early_stop: bool = False,
 ) -> pd.DataFrame:
     """
     Scrapes movie budget data from The-Numbers.com and saves data to CSV
+    Pages are fetched concurrently over a shared keep-alive session, with a
+    token bucket capping the overall request rate. Cached pages are revalidated
+    with conditional GETs, unchanged pages are not re-parsed, and only rows not
+    already in the CSV are appended to it
     ---
     Args:
         budget_path (str) is the path for saving the output csv file
         max_pages (int) is the number of 100-row pages to scrape
         Note: default 5 pages will return 500 rows MAX
+        base_url (str) is the URL of the first budget page
+        max_workers (int) is the number of pages fetched concurrently
+        requests_per_second (float) is the sustained request rate limit
+        cache_dir (str) is the page cache directory (None disables caching)
+        early_stop (bool) stops once a changed page yields only already-known
+        rows. Only valid for date-ordered listings: the budgets listing is ranked
+        by budget, so new films shift later pages, and an unchanged (304) page
+        never stops the scrape
     Returns:
         pd.DataFrame is a cleaned DataFrame with all relevant data
     """
     # makes the directory for the save path
     os.makedirs(os.path.dirname(budget_path), exist_ok=True)
-    base_url = "https://www.the-numbers.com/movie/budgets/all"
-    all_budget_data = []
-
-    logger.info(f"Beginning scrape for ~{max_pages * 100} films")
-    # loops over the available webpages
-    for start in tqdm(range(0, max_pages * 100, 100), desc="Scraping pages"):
-        url = base_url if start == 0 else f"{base_url}/{start + 1}"
-        response = requests.get(url, headers=headers)
-        logger.info(f"Scraping URL: {url}")
-        try:
-            df = pd.read_html(StringIO(response.text))[0]
-        except ValueError:
-            logger.warning(f"No table found at start={start}")
-            continue
-
-        df.columns = [col.strip() for col in df.columns]
-        if df.columns[0] != "Index":
-            df.rename(columns={df.columns[0]: "Index"}, inplace=True)
-        df.set_index("Index", inplace=True)
-
-        # cleans columns with monetary values and turns them into ints
-        for col in ["Production Budget", "Domestic Gross", "Worldwide Gross"]:
-            df[col] = df[col].apply(clean_money)
-        all_budget_data.append(df)
-        time.sleep(1.5)
+    bucket = TokenBucket(rate=requests_per_second, capacity=max_workers)
 
     # if the save path exists, reads the dataframe of existing data
     if os.path.exists(budget_path):
         existing_df = pd.read_csv(budget_path, index_col=0)
+        known = set(row_hashes(existing_df))
     else:
         existing_df = pd.DataFrame()
-    if all_budget_data:
-        new_df = pd.concat(all_budget_data).drop_duplicates()
-        final_df = pd.concat([existing_df, new_df]).drop_duplicates()
+        known = set()
+
+    starts = list(range(0, max_pages * 100, 100))
+    # with early stopping, pages are fetched in waves so later pages can be skipped
+    wave_size = max_workers if early_stop else len(starts)
+    new_rows = []
+    # changed pages are cached only after their rows are saved
+    to_cache = {}
+    stop = False
+
+    logger.info(f"Beginning scrape for ~{max_pages * 100} films")
+    with (
+        make_session(pool_size=max_workers) as session,
+        ThreadPoolExecutor(max_workers=max_workers) as executor,
+        tqdm(total=len(starts), desc="Scraping pages") as progress,
+    ):
+        for w in range(0, len(starts), wave_size):
+            wave = starts[w : w + wave_size]
+            futures = {
+                executor.submit(
+                    fetch_page, session, page_url(base_url, start), bucket, cache_dir
+                ): start
+                for start in wave
+            }
+            pages = {}
+            for future in as_completed(futures):
+                progress.update(1)
+                start = futures[future]
+                try:
+                    pages[start] = future.result()
+                    if pages[start][1]:
+                        to_cache[page_url(base_url, start)] = pages[start][0]
+                except requests.RequestException as e:
+                    logger.warning(f"Failed to fetch page at start={start}: {e}")
+
+            # processes the wave in page order regardless of completion order
+            for start in sorted(pages):
+                page, changed = pages[start]
+                if not changed and known:
+                    logger.info(f"Page at start={start} unchanged. Skipped parsing")
+                    continue
+                df = parse_budget_page(page["html"])
+                if df is None:
+                    logger.warning(f"No table found at start={start}")
+                    continue
+                hashes = row_hashes(df)
+                fresh = ~hashes.isin(known).to_numpy()
+                if not fresh.any():
+                    logger.info(f"Page at start={start} has no new rows")
+                    stop = stop or early_stop
+                    continue
+                known.update(hashes[fresh])
+                new_rows.append(df[fresh])
+            if stop:
+                logger.info("Reached already-known rows. Stopping early")
+                break
+
+    if new_rows:
+        new_df = pd.concat(new_rows)
+        if existing_df.empty:
+            new_df.to_csv(budget_path)
+            final_df = new_df
+        else:
+            # appends only the new rows instead of rewriting the whole file
+            new_df = new_df.reset_index().reindex(
+                columns=[existing_df.index.name, *existing_df.columns]
+            )
+            new_df.to_csv(budget_path, mode="a", header=False, index=False)
+            final_df = pd.concat([existing_df, new_df.set_index(new_df.columns[0])])
         logger.info(
-            f"Saving final dataset with {final_df.shape[0]} rows to {budget_path}"
+            f"Appended {len(new_df)} new rows to {budget_path} ({len(final_df)} total)"
         )
-        final_df.to_csv(budget_path)
-        return final_df
     else:
         logger.warning("No new data scraped.")
-        return existing_df
+        final_df = existing_df
+
+    if cache_dir:
+        for url, page in to_cache.items():
+            write_cached_page(cache_dir, url, page)
+    return final_df
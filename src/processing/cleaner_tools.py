@@ -1,24 +1,177 @@
-from src.utils.helpers import GENRES_RAW_PATH, COLUMN_MAPPING
+from src.utils.helpers import GENRES_RAW_PATH, COLUMN_MAPPING, YEAR_MIN, YEAR_MAX
 from src.utils.logging import setup_logger
+import numpy as np
 import pandas as pd
-from typing import List
+from typing import List, Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import importlib.util
 import glob
+import time
 import os
 
+PYARROW_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+INT64_MAX = np.iinfo(np.int64).max
+# code points parse_money skips: NUL padding, '$', ',' and whitespace
+MONEY_IGNORED = np.array([ord(ch) for ch in "\0$, \t\n\r\xa0"], dtype=np.uint32)
 
-def load_stack_csvs(folder_path: str = GENRES_RAW_PATH):
+
+def _project_columns(path: str, usecols=None, dtype: dict = None) -> tuple:
+    """
+    Resolves usecols (list or predicate) and dtype against a CSV's header so
+    files missing some columns can still be read with the same hints
+    """
+    if usecols is not None:
+        header = pd.read_csv(path, nrows=0).columns
+        keep = usecols if callable(usecols) else set(usecols).__contains__
+        usecols = [col for col in header if keep(col)]
+    if dtype is not None and usecols is not None:
+        dtype = {col: kind for col, kind in dtype.items() if col in usecols}
+    return usecols, dtype
+
+
+def _read_csv_timed(
+    path: str, usecols=None, dtype: dict = None, engine: str = "c"
+) -> tuple[pd.DataFrame, float]:
+    """
+    Reads a single CSV with projected usecols/dtype and returns the frame with
+    its load time in seconds
+    """
+    start = time.perf_counter()
+    usecols, dtype = _project_columns(path, usecols, dtype)
+    df = pd.read_csv(path, usecols=usecols, dtype=dtype, engine=engine)
+    return df, time.perf_counter() - start
+
+
+def iter_csv_chunks(
+    folder_path: str,
+    chunksize: int,
+    usecols: list | Callable[[str], bool] = None,
+    dtype: dict = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields every CSV file in a folder as consecutive DataFrame chunks, so large
+    datasets can be processed in bounded memory
+    ---
+    Args:
+        folder_path (str): path to the folder containing the raw CSV files
+        chunksize (int): number of rows per chunk
+        usecols (list | callable): columns to read (or a predicate on column names)
+        dtype (dict): column dtypes to apply at read time
+    Yields:
+        pd.DataFrame: the next chunk of rows
+    """
+    for path in sorted(glob.glob(os.path.join(folder_path, "*.csv"))):
+        file_cols, file_dtype = _project_columns(path, usecols, dtype)
+        with pd.read_csv(
+            path, usecols=file_cols, dtype=file_dtype, chunksize=chunksize
+        ) as reader:
+            yield from reader
+
+
+def load_stack_csvs(
+    folder_path: str = GENRES_RAW_PATH,
+    usecols: list | Callable[[str], bool] = None,
+    dtype: dict = None,
+    max_workers: int = None,
+    engine: str = None,
+) -> pd.DataFrame:
     """
     Loads and stacks any/all available CSV files from a specified folder
     into a single DataFrame
+    Files are read concurrently in a thread pool (the CSV parsers release the
+    GIL), using the pyarrow engine when it is installed
     ---
     Args:
         folder_path (str): path to the folder containing the raw CSV files
+        usecols (list | callable): columns to read (or a predicate on column
+            names); other columns are never materialized
+        dtype (dict): column dtypes to apply at read time
+        max_workers (int): number of files read at once (defaults to CPU count)
+        engine (str): pandas CSV engine (defaults to 'pyarrow' if available)
     Returns:
         pd.DataFrame: concatenated DataFrame of all CSV files
     """
-    csv_files = glob.glob(os.path.join(folder_path, "*.csv"))
-    dfs = [pd.read_csv(f) for f in csv_files]
-    return pd.concat(dfs, ignore_index=True)
+    logger = setup_logger("csv_loader", "process_datasets")
+    csv_files = sorted(glob.glob(os.path.join(folder_path, "*.csv")))
+    engine = engine or ("pyarrow" if PYARROW_AVAILABLE else "c")
+    read = partial(_read_csv_timed, usecols=usecols, dtype=dtype, engine=engine)
+    workers = max_workers or min(len(csv_files), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(read, csv_files))
+    for path, (df, elapsed) in zip(csv_files, results):
+        logger.info(
+            "Loaded %s: %d rows in %.2fs (%s engine)",
+            os.path.basename(path),
+            len(df),
+            elapsed,
+            engine,
+        )
+    return pd.concat([df for df, _ in results], ignore_index=True)
+
+
+def build_read_schema(
+    source: str,
+    target_cols: List[str],
+    extra_cols: List[str] = None,
+    dtypes: dict = None,
+) -> tuple[List[str], dict]:
+    """
+    Derives the raw columns (and their dtypes) to read for a dataset from
+    COLUMN_MAPPING: every raw column whose standardized name is a target column,
+    plus any extra raw columns needed for filtering
+    ---
+    Args:
+        source (str): the dataset source key (e.g., 'tmdb', 'genres', 'budget')
+        target_cols (List[str]): standardized columns kept in the output
+        extra_cols (List[str]): additional raw columns to read
+        dtypes (dict): raw column dtypes, restricted to the columns read
+    Returns:
+        tuple[List[str], dict]: usecols and dtype arguments for load_stack_csvs
+    """
+    mapping = COLUMN_MAPPING.get(source, {})
+    usecols = [raw for raw, std in mapping.items() if std in target_cols]
+    usecols += [col for col in extra_cols or [] if col not in usecols]
+    dtype = {col: kind for col, kind in (dtypes or {}).items() if col in usecols}
+    return usecols, dtype
+
+
+def parse_money(values) -> pd.Series:
+    """
+    Vectorized currency parsing (e.g., '$1,250,000' -> 1250000) that ignores '$',
+    commas and whitespace (including non-breaking spaces). Blank values, values
+    with any other character (e.g., '1.5', '-$5') and amounts beyond the int64
+    range become <NA>
+    Strings are viewed as a matrix of code points and digits are accumulated
+    one character position at a time, so no Python code runs per value
+    ---
+    Args:
+        values (list | pd.Series): currency strings (numeric input is just cast)
+    Returns:
+        pd.Series: nullable Int64 amounts (keeps the index of a Series input)
+    """
+    index = values.index if isinstance(values, pd.Series) else None
+    if pd.api.types.is_numeric_dtype(getattr(values, "dtype", None)):
+        return pd.Series(values, index=index).astype("Int64")
+    chars = np.asarray(values, dtype=str)
+    if chars.size == 0 or chars.itemsize == 0:
+        return pd.Series(pd.array([pd.NA] * chars.size, dtype="Int64"), index=index)
+    codes = chars.view(np.uint32).reshape(len(chars), -1)
+    amounts = np.zeros(len(chars), dtype=np.int64)
+    has_digit = np.zeros(len(chars), dtype=bool)
+    invalid = np.zeros(len(chars), dtype=bool)
+    # Horner's rule, one vectorized step per character position
+    for column in codes.T:
+        is_digit = (column >= ord("0")) & (column <= ord("9"))
+        digits = column.astype(np.int64) - ord("0")
+        # the next step would pass the int64 maximum
+        fits = amounts <= (INT64_MAX - np.where(is_digit, digits, 0)) // 10
+        amounts = np.where(is_digit & fits, amounts * 10 + digits, amounts)
+        has_digit |= is_digit
+        # NUL is numpy's padding for shorter strings
+        invalid |= (is_digit & ~fits) | ~(is_digit | np.isin(column, MONEY_IGNORED))
+    missing = ~has_digit | invalid
+    return pd.Series(pd.arrays.IntegerArray(amounts, missing), index=index)
 
 
 def normalize_title_column(
@@ -89,47 +242,68 @@ def drop_unused_columns(df: pd.DataFrame, cols_to_drop: list) -> pd.DataFrame:
     return df.drop(columns=cols_to_drop, errors="ignore")
 
 
-def split_genres_list(df: pd.DataFrame, genre_column="genre") -> List[str]:
+def split_genres_list(
+    df: pd.DataFrame,
+    genre_column="genre",
+    long_format: bool = False,
+    id_column: str = "movie_id",
+) -> pd.DataFrame:
     """
     Converts genre strings to a list for each row
+    Each distinct genre string is split once with vectorized str.split/explode/
+    strip/title on the factorized values, and rows pick up their result by code,
+    so the work scales with the number of distinct genre strings, not rows.
+    Rows with the same genre string share one (read-only) list object
     ---
     Args:
         df (pd.DataFrame): input DataFrame with target genre column
         genre_column (str): name of the column containing genre strings
+        long_format (bool): returns (id_column, genre_column) pairs instead of lists
+        id_column (str): row identifier column used for the long format
     Returns:
-        pd.DataFrame: same DataFrame with genre column converted to List[str]
+        pd.DataFrame: same DataFrame with genre column converted to List[str], or a
+            long-format table with one row per (id, genre) pair
     """
-    df = df.copy()
     if genre_column not in df.columns:
         raise ValueError(f"'{genre_column}' column not found in dataframe.")
-    df[genre_column] = df[genre_column].fillna("")
+    codes, uniques = pd.factorize(df[genre_column].fillna("").astype(str))
+    parts = pd.Series(uniques).str.split(",").explode().str.strip().str.title()
+    parts = parts[parts.notna() & (parts != "")]
 
-    def safe_split(genres):
-        if isinstance(genres, str) and genres.strip() != "":
-            return [g.strip().title() for g in genres.split(",") if g.strip()]
-        else:
-            return []
+    if long_format:
+        lookup = pd.DataFrame({"code": parts.index, genre_column: parts.to_numpy()})
+        rows = pd.DataFrame({id_column: df[id_column].to_numpy(), "code": codes})
+        return rows.merge(lookup, on="code")[[id_column, genre_column]]
 
-    df[genre_column] = df[genre_column].apply(safe_split)
-    return df
+    lists = [[] for _ in range(len(uniques))]
+    for code, genre in zip(parts.index, parts.to_numpy()):
+        lists[code].append(genre)
+    per_row = pd.Series(lists, dtype=object).to_numpy().take(codes)
+    return df.assign(**{genre_column: per_row})
 
 
-def group_decades(year: int) -> None:
+def label_decades(years: pd.Series) -> pd.Series:
     """
-    Converts year into decade label and adds new 'decade' column (e.g.,
-    1986 -> '1980-1989')
+    Labels every year with its decade (e.g., 1986 -> '1980–1989') using
+    vectorized integer arithmetic, returned as an ordered Categorical so
+    decades sort chronologically and are stored as small integer codes
     ---
     Args:
-        year (int): the year to convert
+        years (pd.Series): release years (missing/invalid values are allowed)
     Returns:
-        str: decade label or None if year is missing or invalid
-    """
-    try:
-        start = int(year) // 10 * 10
-        end = start + 9
-        return f"{start}–{end}"
-    except Exception:
-        return None
+        pd.Series: ordered categorical decade labels (NaN where year is missing)
+    """
+    starts = (pd.to_numeric(years, errors="coerce") // 10 * 10).astype("Int64")
+    # categories span the supported years so every dataset shares the same set
+    low, high = YEAR_MIN // 10 * 10, YEAR_MAX // 10 * 10
+    if starts.notna().any():
+        low, high = min(low, int(starts.min())), max(high, int(starts.max()))
+    categories = [f"{start}–{start + 9}" for start in range(low, high + 1, 10)]
+    codes = ((starts - low) // 10).fillna(-1).astype(int)
+    return pd.Series(
+        pd.Categorical.from_codes(codes, categories=categories, ordered=True),
+        index=years.index,
+    )
 
 
 def standardize_columns(
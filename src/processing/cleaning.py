@@ -1,20 +1,25 @@
 import pandas as pd
 from datetime import datetime
 import re
-from src.utils.logging import setup_logger
+from src.utils.logging import setup_logger, ProgressLogger
 from src.processing.cleaner_tools import (
     load_stack_csvs,
+    iter_csv_chunks,
     drop_unused_columns,
     normalize_title_column,
     extract_year,
     add_normalized_title_year,
-    group_decades,
+    label_decades,
     generate_col_order,
+    build_read_schema,
+    parse_money,
     split_genres_list,
     standardize_columns,
     prune_columns,
 )
 
+from src.processing.storage import write_frame, write_frame_chunks
+
 # Path Constants
 from src.utils.helpers import (
     GENRES_RAW_PATH,
@@ -33,43 +38,26 @@ from src.utils.helpers import (
     PRUNED_GENRE_COLS,
     PRUNED_TMDB_COLS,
     PRUNED_BUDGET_COLS,
+    TMDB_FILTER_COLS,
+    TMDB_READ_DTYPES,
 )
 
+# Supported Release Years
+from src.utils.helpers import YEAR_MIN, YEAR_MAX
+
 # Column Order
 TMDB_FULL_COL_ORDER = generate_col_order("tmdb")
 GENRE_FULL_COL_ORDER = generate_col_order("genres")
 BUDGET_FULL_COL_ORDER = generate_col_order("budget")
 
 
-def clean_tmdb_to_csv(
-    raw_path: str = TMDB_RAW_PATH,
-    cols_to_drop: list = TMDB_COLS_TO_DROP,
-    output_path: str = TMDB_OUTPUT_PATH,
-    column_order: list = TMDB_FULL_COL_ORDER,
-    target_column_order: list = PRUNED_TMDB_COLS,
-    export: bool = True,
-) -> pd.DataFrame:
+def _filter_tmdb_rows(tmdb_df: pd.DataFrame, logger) -> pd.DataFrame:
     """
-    Loads, cleans, and standardizes the TMDb dataset before exporting it to a processed CSV
-    ---
-    Args:
-        raw_path (str): path to the raw TMDb CSV folder
-        cols_to_drop (list): list of columns to drop
-        output_path (str): path to save the cleaned CSV
-        column_order (list): final column order for the output CSV
-    Returns:
-        pd.DataFrame: the cleaned TMDb dataset
+    Row-level TMDb cleaning shared by the batch and streaming modes: drops
+    untitled, empty, unreleased and adult rows, normalizes titles, and
+    extracts and validates 'year'
     """
-    logger = setup_logger("tmdb_cleaner", "process_datasets")
-    logger.info("Starting TMDb cleaning pipeline...")
-
-    # loading/stacking data
-    tmdb_df = load_stack_csvs(raw_path)
-    logger.info("Loaded TMDb CSVs. Total rows: %d", len(tmdb_df))
-
-    # dropping unnecessary columns and missing values
-    tmdb_df = drop_unused_columns(tmdb_df, cols_to_drop)
-    logger.info("Dropped unused columns.")
+    # dropping missing values
     tmdb_df = tmdb_df[tmdb_df["title"].notna() & (tmdb_df["title"].str.strip() != "")]
     logger.info(
         "Removed rows with missing or empty 'title'. Remaining: %d", len(tmdb_df)
@@ -108,35 +96,161 @@ def clean_tmdb_to_csv(
     # dropping where 'year' = NaN, converting to int, handling edge cases in 'year'
     tmdb_df = tmdb_df.dropna(subset=["year"])
     tmdb_df["year"] = tmdb_df["year"].astype(int)
-    tmdb_df = tmdb_df[(tmdb_df["year"] >= 1880) & (tmdb_df["year"] <= 2025)]
+    tmdb_df = tmdb_df[tmdb_df["year"].between(YEAR_MIN, YEAR_MAX)]
     logger.info("'year' validated and cleaned. Remaining: %d", len(tmdb_df))
+    return tmdb_df
 
-    # handling duplicates (imdb_id and normalized title)
-    tmdb_df = tmdb_df.sort_values(by="year", ascending=True)
-    tmdb_df = tmdb_df.drop_duplicates(subset="imdb_id", keep="first")
-    tmdb_df = tmdb_df.drop_duplicates(subset=["normalized_title", "year"])
-    logger.info("Removed duplicates. Final row count: %d", len(tmdb_df))
 
+def _finalize_tmdb_columns(
+    tmdb_df: pd.DataFrame, column_order: list, target_column_order: list, logger
+) -> pd.DataFrame:
+    """
+    Adds decades, splits genres, and standardizes/prunes the TMDb columns
+    """
     # adding decade grouping
-    tmdb_df["decade"] = tmdb_df["year"].apply(group_decades)
+    tmdb_df["decade"] = label_decades(tmdb_df["year"])
     logger.info("Grouped data by decade.")
 
     # splitting and normalizing 'genres' columns
     tmdb_df = split_genres_list(tmdb_df, genre_column="genres")
     logger.info("Split 'genres' into lists.")
 
-    # reorganizing and outputting to CSV
+    # reorganizing columns
     tmdb_df = standardize_columns(tmdb_df, source="tmdb", column_order=column_order)
-    tmdb_df = prune_columns(
-        tmdb_df, target_cols=target_column_order, source_name="tmdb"
+    return prune_columns(tmdb_df, target_cols=target_column_order, source_name="tmdb")
+
+
+def clean_tmdb_to_csv(
+    raw_path: str = TMDB_RAW_PATH,
+    cols_to_drop: list = TMDB_COLS_TO_DROP,
+    output_path: str = TMDB_OUTPUT_PATH,
+    column_order: list = TMDB_FULL_COL_ORDER,
+    target_column_order: list = PRUNED_TMDB_COLS,
+    export: bool = True,
+    chunksize: int = None,
+) -> pd.DataFrame | int:
+    """
+    Loads, cleans, and standardizes the TMDb dataset before exporting it to a processed CSV
+    With chunksize set, runs in streaming mode: the raw CSVs are processed chunk
+    by chunk in bounded memory, duplicate state (seen imdb_id and
+    normalized_title + year keys) is carried across chunks, and each cleaned
+    chunk is appended to output_path and streamed into the store, returning
+    the row count instead of the whole dataset. Streaming keeps
+    the first occurrence of a duplicate in file order (rather than the earliest
+    year) and leaves the output in file order instead of sorting it by title
+    ---
+    Args:
+        raw_path (str): path to the raw TMDb CSV folder
+        cols_to_drop (list): list of columns to drop
+        output_path (str): path to save the cleaned CSV
+        column_order (list): final column order for the output CSV
+        chunksize (int): rows per chunk for streaming mode (None loads everything)
+    Returns:
+        pd.DataFrame | int: the cleaned TMDb dataset (its row count when streaming)
+    """
+    logger = setup_logger("tmdb_cleaner", "process_datasets")
+    logger.info("Starting TMDb cleaning pipeline...")
+
+    # reading only the columns that survive pruning (plus filter columns),
+    # with nullable/categorical dtypes applied at read time
+    usecols, dtype = build_read_schema(
+        "tmdb", target_column_order, TMDB_FILTER_COLS, TMDB_READ_DTYPES
     )
+    usecols = [col for col in usecols if col not in cols_to_drop]
+    if chunksize:
+        if export is not True:
+            raise ValueError(
+                "Streaming mode writes to output_path; export must be True."
+            )
+        return _stream_clean_tmdb(
+            raw_path,
+            output_path,
+            usecols,
+            dtype,
+            chunksize,
+            column_order,
+            target_column_order,
+            logger,
+        )
+
+    # loading/stacking data
+    tmdb_df = load_stack_csvs(raw_path, usecols=usecols, dtype=dtype)
+    logger.info("Loaded TMDb CSVs. Total rows: %d", len(tmdb_df))
+    tmdb_df = _filter_tmdb_rows(tmdb_df, logger)
+
+    # handling duplicates (imdb_id and normalized title)
+    tmdb_df = tmdb_df.sort_values(by="year", ascending=True)
+    tmdb_df = tmdb_df.drop_duplicates(subset="imdb_id", keep="first")
+    tmdb_df = tmdb_df.drop_duplicates(subset=["normalized_title", "year"])
+    logger.info("Removed duplicates. Final row count: %d", len(tmdb_df))
+
+    # outputting to CSV
+    tmdb_df = _finalize_tmdb_columns(tmdb_df, column_order, target_column_order, logger)
     tmdb_df = tmdb_df.sort_values(by="title", ascending=True)
     if export is True:
         tmdb_df.to_csv(output_path, index=False)
+        write_frame(tmdb_df, output_path, source=raw_path)
         logger.info("Exported cleaned TMDb data to %s", output_path)
     return tmdb_df
 
 
+def _stream_clean_tmdb(
+    raw_path: str,
+    output_path: str,
+    usecols: list,
+    dtype: dict,
+    chunksize: int,
+    column_order: list,
+    target_column_order: list,
+    logger,
+) -> int:
+    """
+    Streaming mode of clean_tmdb_to_csv: cleans each raw chunk, removes rows
+    whose imdb_id or normalized_title + year was already seen in an earlier
+    chunk, and appends the result to output_path. Each cleaned chunk is also
+    streamed into the store (with its manifest) through write_frame_chunks, so
+    the merge stage reuses it and no more than one chunk is held in memory
+    ---
+    Returns:
+        int: the number of cleaned TMDb rows
+    """
+    seen_ids, seen_keys = set(), set()
+    progress = ProgressLogger(logger, "TMDb streaming clean", every_rows=chunksize)
+
+    def cleaned_chunks():
+        written = 0
+        for chunk in iter_csv_chunks(raw_path, chunksize, usecols=usecols, dtype=dtype):
+            raw_rows = len(chunk)
+            chunk = _filter_tmdb_rows(chunk, logger)
+
+            # duplicates within the chunk, then against earlier chunks
+            chunk = chunk.sort_values(by="year", ascending=True)
+            ids = chunk["imdb_id"].fillna("").astype(str)
+            chunk = chunk[~ids.duplicated() & ~ids.isin(seen_ids)]
+            keys = chunk["normalized_title_year"]
+            chunk = chunk[~keys.duplicated() & ~keys.isin(seen_keys)]
+            seen_ids.update(chunk["imdb_id"].fillna("").astype(str))
+            seen_keys.update(chunk["normalized_title_year"])
+
+            chunk = _finalize_tmdb_columns(
+                chunk, column_order, target_column_order, logger
+            )
+            chunk.to_csv(
+                output_path,
+                mode="w" if written == 0 else "a",
+                header=written == 0,
+                index=False,
+            )
+            written += len(chunk)
+            progress.update(raw_rows)
+            yield chunk
+
+    rows = write_frame_chunks(cleaned_chunks(), output_path, source=raw_path)
+    progress.finish()
+    logger.info("Streamed %d cleaned TMDb rows to %s", rows, output_path)
+    return rows
+
+
 def clean_genres_to_csv(
     raw_path: str = GENRES_RAW_PATH,
     cols_to_drop: list = GENRE_COLS_TO_DROP,
@@ -163,7 +277,7 @@ def clean_genres_to_csv(
     logger.info("Starting genres cleaning pipeline...")
 
     # loading all available genre.csvs and stacking to single dataframe
-    genres_df = load_stack_csvs(raw_path)
+    genres_df = load_stack_csvs(raw_path, usecols=lambda col: col not in cols_to_drop)
     logger.info("Loaded genre CSVs. Total rows: %d", len(genres_df))
 
     # normalizing genre movie names
@@ -198,7 +312,7 @@ def clean_genres_to_csv(
     genres_df["year"] = genres_df["year"].astype(str).str.strip()
     genres_df = genres_df[genres_df["year"].str.fullmatch(r"\d{4}")].copy()
     genres_df["year"] = genres_df["year"].astype(int)
-    genres_df = genres_df[(genres_df["year"] >= 1880) & (genres_df["year"] <= 2025)]
+    genres_df = genres_df[genres_df["year"].between(YEAR_MIN, YEAR_MAX)]
     logger.info("'year' column cleaned and validated.")
 
     # generating fallback merge key: normalized_title + year
@@ -206,7 +320,7 @@ def clean_genres_to_csv(
     logger.info("Created 'normalized_title_year' column for fallback merging.")
 
     # grouping decades
-    genres_df["decade"] = genres_df["year"].apply(group_decades)
+    genres_df["decade"] = label_decades(genres_df["year"])
     logger.info("Grouped data by decade.")
 
     # renaming "gross(in $)" column to "total_gross"
@@ -239,6 +353,7 @@ def clean_genres_to_csv(
     genres_df = genres_df.sort_values(by="title", ascending=True)
     if export is True:
         genres_df.to_csv(output_path, index=False)
+        write_frame(genres_df, output_path, source=raw_path)
         logger.info("Exported cleaned genres data to %s", output_path)
     return genres_df
 
@@ -278,6 +393,12 @@ def clean_budgets_to_csv(
         budgets_df = extract_year(budgets_df, date_column="Release Date")
         logger.info("Extracted year from 'Release Date'.")
 
+    # parsing any currency strings in the money columns into nullable ints
+    for col in ["Production Budget", "Domestic Gross", "Worldwide Gross"]:
+        if col in budgets_df.columns:
+            budgets_df[col] = parse_money(budgets_df[col])
+    logger.info("Parsed money columns.")
+
     # normalizing movie titles & creating new column
     budgets_df = normalize_title_column(
         budgets_df, column="Movie", new_column="normalized_title"
@@ -297,7 +418,7 @@ def clean_budgets_to_csv(
     logger.info("Created 'normalized_title_year' column for fallback merging.")
 
     # grouping decades
-    budgets_df["decade"] = budgets_df["year"].apply(group_decades)
+    budgets_df["decade"] = label_decades(budgets_df["year"])
     logger.info("Grouped data by decade.")
 
     # organizing and outputting results to CSV
@@ -311,5 +432,6 @@ def clean_budgets_to_csv(
     budgets_df = budgets_df.sort_values(by="title", ascending=True)
     if export is True:
         budgets_df.to_csv(output_path, index=False)
+        write_frame(budgets_df, output_path, source=raw_path)
         logger.info("Exported cleaned budget data to %s", output_path)
     return budgets_df
@@ -0,0 +1,270 @@
+## TITLE MATCHING ACROSS DATASETS ##
+import numpy as np
+import pandas as pd
+from difflib import SequenceMatcher
+from src.utils.logging import setup_logger
+from src.utils.helpers import (
+    FUZZY_MATCH_THRESHOLD,
+    FUZZY_YEAR_WINDOW,
+    FUZZY_GRAM_SIZE,
+)
+
+MATCH_KEYS = ["normalized_title", "year"]
+
+
+def _key_frame(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """
+    Normalizes key dtypes so lookups match across sources (e.g., 'year' read
+    as int64 in one dataset and Int64 or float in another)
+    """
+    normalized = {}
+    for key in keys:
+        values = df[key]
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            normalized[key] = pd.to_numeric(values).astype("Int64")
+        else:
+            normalized[key] = values.astype("string")
+    return pd.DataFrame(normalized, index=df.index)
+
+
+class TitleYearIndex:
+    """
+    Hash index from (normalized_title, year) to an id, built once over several
+    sources in priority order. The keys are held in a pandas MultiIndex, whose
+    levels are dictionary-encoded (each distinct title and year stored once,
+    rows as integer codes) and whose lookups go through a hash table, so a
+    whole frame is resolved in one vectorized get_indexer pass
+    ---
+    Args:
+        sources (dict[str, pd.DataFrame]): source name -> DataFrame, highest
+        priority first; a key found in several sources resolves to the first
+        id_column (str): column holding the id to return
+        keys (list[str]): columns forming the match key
+    """
+
+    def __init__(
+        self,
+        sources: dict[str, pd.DataFrame],
+        id_column: str = "movie_id",
+        keys: list[str] = MATCH_KEYS,
+    ):
+        self.id_column = id_column
+        self.keys = keys
+        self.source_names = list(sources)
+        frames = []
+        for code, df in enumerate(sources.values()):
+            frame = _key_frame(df, keys)
+            frame[id_column] = df[id_column].to_numpy()
+            frame["_source"] = code
+            frames.append(frame)
+        combined = pd.concat(frames, ignore_index=True).dropna(subset=keys)
+        # sources are stacked in priority order, so keeping the first wins ties
+        combined = combined.drop_duplicates(subset=keys, keep="first")
+        self.entries = combined.reset_index(drop=True)
+        self._index = pd.MultiIndex.from_frame(self.entries[keys])
+        self._ids = self.entries[id_column].to_numpy()
+        self._sources = self.entries["_source"].to_numpy()
+        self.sizes = {
+            name: int((self._sources == code).sum())
+            for code, name in enumerate(self.source_names)
+        }
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def lookup(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Resolves every row of df against the index in one pass
+        ---
+        Args:
+            df (pd.DataFrame): rows to match, containing the key columns
+        Returns:
+            pd.DataFrame: aligned to df, with the matched id (NaN if unmatched)
+            and a categorical 'match_source' naming the source it came from
+        """
+        probe = pd.MultiIndex.from_frame(_key_frame(df, self.keys))
+        positions = self._index.get_indexer(probe)
+        found = positions >= 0
+        ids = np.full(len(df), np.nan, dtype=object)
+        ids[found] = self._ids[positions[found]]
+        codes = np.where(found, self._sources[np.where(found, positions, 0)], -1)
+        return pd.DataFrame(
+            {
+                self.id_column: ids,
+                "match_source": pd.Categorical.from_codes(
+                    codes, categories=self.source_names
+                ),
+            },
+            index=df.index,
+        )
+
+
+class FuzzyTitleMatcher:
+    """
+    Approximate title matcher for rows the exact index could not resolve.
+    Candidates are blocked by release year (within +/- year_window) and by the
+    title's leading or trailing n-gram, so each row is compared against a small
+    bucket instead of the whole catalogue. Within a bucket, candidates are cut
+    by a vectorized length bound and by their digits (so 'Part 2' never
+    matches 'Part 3'), then by SequenceMatcher's quick_ratio, and only the
+    survivors get a full ratio
+    ---
+    Args:
+        index (TitleYearIndex): exact index whose entries (and source
+        priorities) are searched
+        threshold (float): minimum similarity (0-1) to accept a match
+        year_window (int): maximum difference in release year
+        gram_size (int): length of the leading/trailing blocking n-grams
+    """
+
+    def __init__(
+        self,
+        index: TitleYearIndex,
+        threshold: float = FUZZY_MATCH_THRESHOLD,
+        year_window: int = FUZZY_YEAR_WINDOW,
+        gram_size: int = FUZZY_GRAM_SIZE,
+    ):
+        self.index = index
+        self.threshold = threshold
+        self.year_window = year_window
+        self.gram_size = gram_size
+        title_key, year_key = index.keys
+        entries = index.entries
+        titles = entries[title_key].astype(str)
+        self._titles = titles.to_numpy(dtype=object)
+        self._years = entries[year_key].to_numpy(dtype=np.int64)
+        self._lengths = titles.str.len().to_numpy()
+        # numbers in titles (sequels, years) must agree exactly
+        self._digits = titles.str.replace(r"\D+", "", regex=True).to_numpy(dtype=object)
+        positions = pd.Series(np.arange(len(entries)))
+        # one bucket per (year, leading n-gram) and per (year, trailing n-gram)
+        self._blocks = {
+            side: positions.groupby([self._years, grams.to_numpy()]).indices
+            for side, grams in (
+                ("head", titles.str[:gram_size]),
+                ("tail", titles.str[-gram_size:]),
+            )
+        }
+
+    def candidates(self, title: str, year: int) -> np.ndarray:
+        """
+        Returns the entry positions sharing a blocking key with (title, year)
+        """
+        head, tail = title[: self.gram_size], title[-self.gram_size :]
+        buckets = [
+            self._blocks[side].get((y, gram))
+            for y in range(year - self.year_window, year + self.year_window + 1)
+            for side, gram in (("head", head), ("tail", tail))
+        ]
+        buckets = [bucket for bucket in buckets if bucket is not None]
+        if not buckets:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(np.concatenate(buckets))
+
+    def _best_match(
+        self, title: str, year: int, available: np.ndarray = None
+    ) -> tuple[int, float] | None:
+        candidates = self.candidates(title, year)
+        if available is not None:
+            candidates = candidates[available[candidates]]
+        # ratio is at most 2*min(len)/(len_a + len_b), so short/long titles are cut in bulk
+        lengths = self._lengths[candidates]
+        bound = 2 * np.minimum(lengths, len(title)) / (lengths + len(title))
+        digits = "".join(ch for ch in title if ch.isdigit())
+        candidates = candidates[
+            (bound >= self.threshold) & (self._digits[candidates] == digits)
+        ]
+        if len(candidates) == 0:
+            return None
+
+        # SequenceMatcher caches its analysis of seq2, so the probe title goes there
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(title)
+        best, best_rank = None, None
+        for pos in candidates:
+            matcher.set_seq1(self._titles[pos])
+            if matcher.quick_ratio() < self.threshold:
+                continue
+            score = matcher.ratio()
+            if score < self.threshold:
+                continue
+            # highest score first, then source priority, then closest year
+            rank = (score, -self.index._sources[pos], -abs(self._years[pos] - year))
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (pos, score), rank
+        return best
+
+    def match(self, df: pd.DataFrame, exclude_ids=None) -> pd.DataFrame:
+        """
+        Finds the best approximate match for every row of df
+        ---
+        Args:
+            df (pd.DataFrame): rows to match, containing the key columns
+            exclude_ids (Iterable): ids that may not be matched (e.g., those
+            already taken by exact matches)
+        Returns:
+            pd.DataFrame: aligned to df, with the matched id, 'match_source',
+            'match_score' and the matched title and year (NaN if unmatched)
+        """
+        title_key, year_key = self.index.keys
+        keys = _key_frame(df, self.index.keys)
+        n = len(df)
+        positions = np.full(n, -1, dtype=np.intp)
+        scores = np.full(n, np.nan)
+        available = None
+        if exclude_ids is not None:
+            available = ~pd.Series(self.index._ids).isin(list(exclude_ids)).to_numpy()
+        for i, (title, year) in enumerate(zip(keys[title_key], keys[year_key])):
+            if pd.isna(title) or pd.isna(year) or not title:
+                continue
+            best = self._best_match(title, int(year), available)
+            if best is not None:
+                positions[i], scores[i] = best
+
+        found = positions >= 0
+        safe = np.where(found, positions, 0)
+        ids = np.where(found, self.index._ids[safe], np.nan)
+        matched_years = pd.array(self._years[safe], dtype="Int64")
+        matched_years[~found] = pd.NA
+        return pd.DataFrame(
+            {
+                self.index.id_column: ids,
+                "match_source": pd.Categorical.from_codes(
+                    np.where(found, self.index._sources[safe], -1),
+                    categories=self.index.source_names,
+                ),
+                "match_score": scores,
+                f"matched_{title_key}": np.where(found, self._titles[safe], np.nan),
+                f"matched_{year_key}": matched_years,
+            },
+            index=df.index,
+        )
+
+
+def match_rates(match_source: pd.Series, total: int = None) -> dict:
+    """
+    Summarizes how many rows each source resolved
+    ---
+    Args:
+        match_source (pd.Series): the 'match_source' column returned by lookup
+        total (int): number of rows attempted (defaults to len(match_source))
+    Returns:
+        dict: source name (plus 'unmatched') -> {'rows', 'rate'}
+    """
+    total = len(match_source) if total is None else total
+    counts = match_source.value_counts(sort=False).to_dict()
+    counts["unmatched"] = int(match_source.isna().sum())
+    return {
+        str(name): {"rows": int(rows), "rate": rows / total if total else 0.0}
+        for name, rows in counts.items()
+    }
+
+
+def log_match_rates(rates: dict, label: str) -> None:
+    """
+    Writes the per-source match rates to the matching log
+    """
+    logger = setup_logger("title_matcher", "merge_datasets")
+    for name, stats in rates.items():
+        logger.info(f"{label} - {name}: {stats['rows']} rows ({stats['rate']:.1%})")
+    return
@@ -1,7 +1,9 @@
 import pandas as pd
+import numpy as np
 import ast
 import os
-from typing import List
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List
 from src.utils.logging import setup_logger
 from src.utils.helpers import TMDB_CRIT_COLS, GENRES_CRIT_COLS, BUDGET_CRIT_COLS
 from src.utils.helpers import (
@@ -9,12 +11,25 @@ from src.utils.helpers import (
     GENRES_OUTPUT_PATH,
     BUDGET_OUTPUT_PATH,
     PROCESSED_PATH,
+    MOVIE_GENRE_LINKS_PATH,
+    FUZZY_MATCH_REPORT_PATH,
+    TMDB_RAW_PATH,
+    GENRES_RAW_PATH,
+    BUDGET_RAW_PATH,
 )
 from src.processing.cleaning import (
     clean_tmdb_to_csv,
     clean_genres_to_csv,
     clean_budgets_to_csv,
 )
+from src.processing.matching import (
+    TitleYearIndex,
+    FuzzyTitleMatcher,
+    MATCH_KEYS,
+    match_rates,
+    log_match_rates,
+)
+from src.processing.storage import read_frame, is_fresh, fingerprint_inputs
 
 
 # drop the null values first in tmdb, genres, and budgets
@@ -59,35 +74,101 @@ def merge_movie_ids(
 
 
 def assign_budget_movie_id(
-    budgets_df: pd.DataFrame, tmdb_df: pd.DataFrame, genres_df: pd.DataFrame
+    budgets_df: pd.DataFrame,
+    tmdb_df: pd.DataFrame,
+    genres_df: pd.DataFrame,
+    fuzzy: bool = True,
+    report_path: str = FUZZY_MATCH_REPORT_PATH,
 ) -> pd.DataFrame:
     """
-    Matches budgets to movies by merging on normalized_title + year
-    First tries to match with TMDB, then falls back on the genres dataset
+    Matches budgets to movies on normalized_title + year
+    TMDB and the genres dataset are indexed together once, with TMDB taking
+    priority, and all budgets are resolved in a single lookup pass
+    Budgets without an exact match are then fuzzy-matched on title (within a
+    year either side) against the movies no exact match took, and the
+    recovered rows are written to a report
+    Matches are one-to-one: when several budgets resolve to the same movie,
+    only the best one is kept (exact before fuzzy, then the highest score,
+    then the source priority)
     Any remaining unmatched budget rows are dropped
+    ---
+    Args:
+        fuzzy (bool): attempt fuzzy matching of the exact-match leftovers
+        report_path (str): CSV path for the recovered rows (None skips the report)
     """
     logger = setup_logger("budget_merger", "merge_datasets")
-    # merging with TMDB on normalized_title + year
-    merged = budgets_df.merge(
-        tmdb_df[["normalized_title", "year", "movie_id"]],
-        on=["normalized_title", "year"],
-        how="left",
+    # rows are tracked by label below, so labels must be unique
+    budgets_df = budgets_df.reset_index(drop=True)
+    index = TitleYearIndex({"tmdb": tmdb_df, "genres": genres_df})
+    logger.info(f"Built title-year index over {len(index)} keys {index.sizes}")
+    matches = index.lookup(budgets_df)
+    log_match_rates(match_rates(matches["match_source"]), "Budget matches")
+    merged = budgets_df.assign(movie_id=matches["movie_id"])
+    # ranks budgets competing for the same movie: score (exact matches score 1),
+    # then source priority
+    ranks = pd.DataFrame(
+        {
+            "score": np.where(merged["movie_id"].notna(), 1.0, np.nan),
+            "source": matches["match_source"].cat.codes,
+        },
+        index=merged.index,
+    )
+
+    unmatched = merged["movie_id"].isna()
+    fuzzy_matches = None
+    if fuzzy and unmatched.any():
+        taken = set(merged["movie_id"].dropna())
+        fuzzy_matches = FuzzyTitleMatcher(index).match(
+            merged[unmatched], exclude_ids=taken
+        )
+        recovered = fuzzy_matches["movie_id"].notna()
+        merged.loc[fuzzy_matches.index, "movie_id"] = fuzzy_matches["movie_id"]
+        ranks.loc[fuzzy_matches.index, "score"] = fuzzy_matches["match_score"]
+        ranks.loc[fuzzy_matches.index, "source"] = fuzzy_matches[
+            "match_source"
+        ].cat.codes
+        logger.info(
+            f"Fuzzy matching recovered {int(recovered.sum())} of "
+            f"{int(unmatched.sum())} unmatched rows"
+        )
+        log_match_rates(
+            match_rates(fuzzy_matches["match_source"]), "Fuzzy budget matches"
+        )
+
+    dropped = int(merged["movie_id"].isna().sum())
+    merged = merged.dropna(subset=["movie_id"])
+    # one budget per movie, so no movie's budget and gross are counted twice
+    ranked = ranks.loc[merged.index].sort_values(
+        ["score", "source"], ascending=[False, True], kind="stable"
     )
-    logger.info(f"Number of matched rows: {len(merged)} rows")
-    # checking unmatched rows (still missing movie_id)
-    unmatched = merged[merged["movie_id"].isna()]
-    logger.info(f"Remaining {len(unmatched)} rows")
-    if not unmatched.empty:
-        unmatched = unmatched.drop(columns=["movie_id"])
-        unmatched = unmatched.merge(
-            genres_df[["normalized_title", "year", "movie_id"]],
-            on=["normalized_title", "year"],
-            how="left",
+    duplicates = ranked.index[merged.loc[ranked.index, "movie_id"].duplicated()]
+    if len(duplicates):
+        logger.warning(
+            f"Dropped {len(duplicates)} budget rows matching an already matched "
+            f"movie: {merged.loc[duplicates, 'title'].head(10).tolist()}"
         )
-        matched = merged[~merged["movie_id"].isna()]
-        merged = pd.concat([matched, unmatched], ignore_index=True)
-    merged = merged.dropna(subset=["movie_id"]).reset_index(drop=True)
-    logger.info(f"There were {len(merged)} still unmatched -> dropped")
+        merged = merged.drop(index=duplicates)
+
+    if report_path and fuzzy_matches is not None:
+        kept = fuzzy_matches.index[fuzzy_matches["movie_id"].notna()]
+        kept = kept[kept.isin(merged.index)]
+        if len(kept):
+            report = pd.concat(
+                [
+                    merged.loc[kept, ["title", *MATCH_KEYS]],
+                    fuzzy_matches.loc[kept],
+                ],
+                axis=1,
+            ).sort_values("match_score")
+            os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+            report.to_csv(report_path, index=False)
+            logger.info(f"Fuzzy match report written to {report_path}")
+
+    merged = merged.reset_index(drop=True)
+    logger.info(
+        f"Matched {len(merged)} rows. {dropped} unmatched -> dropped, "
+        f"{len(duplicates)} duplicate matches -> dropped"
+    )
     return merged
 
 
@@ -111,6 +192,7 @@ def clean_merged_columns(df: pd.DataFrame) -> pd.DataFrame:
 def fix_genre_strings(df: pd.DataFrame, genre_col: str = "genre") -> pd.DataFrame:
     """
     Converts genre column values from string representations to actual Python lists
+    Only needed for legacy CSV exports; the processed store keeps lists natively
     """
     df = df.copy()
     df[genre_col] = df[genre_col].apply(
@@ -151,23 +233,91 @@ def create_movie_genre_links(
     return link_table
 
 
+# cleaned frames of this process: (cleaner, raw path) -> (raw fingerprint, DataFrame)
+_cleaned_memo = {}
+
+
+def _clean_to_store(cleaner: Callable, raw_path: str, output_path: str) -> int:
+    """
+    Runs a cleaner in a worker process, exporting to the processed store,
+    and returns only the row count to the parent
+    """
+    return len(cleaner(raw_path=raw_path, output_path=output_path, export=True))
+
+
 # final cleaning and merging steps put together
 def cleaning_and_merging(
     tmdb_crit_cols: List[str] = TMDB_CRIT_COLS,
     genres_crit_cols: List[str] = GENRES_CRIT_COLS,
     budgets_crit_cols: List[str] = BUDGET_CRIT_COLS,
     export: bool = False,
+    use_processed: bool = False,
+    tmdb_df: pd.DataFrame = None,
+    genres_df: pd.DataFrame = None,
+    budgets_df: pd.DataFrame = None,
 ) -> pd.DataFrame:
     """
     Cleans and merges MoVIZ's datasets in preparation for
     database ingestion
+    Each dataset is cleaned at most once per process: precomputed frames are
+    used as given, and cleaned frames are memoized on the fingerprint of their
+    raw inputs. With use_processed, datasets in the processed store are read
+    back (list columns intact) when their manifest shows the raw inputs are
+    unchanged; otherwise they are recleaned and the store is refreshed
+    ---
+    Args:
+        tmdb_df, genres_df, budgets_df (pd.DataFrame): already-cleaned datasets
+        (e.g., returned by the clean_*_to_csv functions) to use instead of cleaning
     """
     logger = setup_logger("finalizing_clean", "merge_datasets")
     logger.info("Beginning final clean and merge")
     # Raw to Processed DataFrames
-    tmdb_df = clean_tmdb_to_csv(export=False)
-    genres_df = clean_genres_to_csv(export=False)
-    budgets_df = clean_budgets_to_csv(export=False)
+    jobs = [
+        (clean_tmdb_to_csv, TMDB_RAW_PATH, TMDB_OUTPUT_PATH),
+        (clean_genres_to_csv, GENRES_RAW_PATH, GENRES_OUTPUT_PATH),
+        (clean_budgets_to_csv, BUDGET_RAW_PATH, BUDGET_OUTPUT_PATH),
+    ]
+    datasets = [tmdb_df, genres_df, budgets_df]
+    fingerprints = {}
+    for i, (cleaner, raw_path, _) in enumerate(jobs):
+        if datasets[i] is not None:
+            continue
+        fingerprints[i] = fingerprint_inputs(raw_path)
+        memo = _cleaned_memo.get((cleaner.__name__, raw_path))
+        if memo is not None and memo[0] == fingerprints[i]:
+            # shallow copy so callers can reassign columns without touching the memo
+            datasets[i] = memo[1].copy(deep=False)
+            logger.info(f"Inputs unchanged, reused cleaned {raw_path} from memory")
+    pending = [i for i in range(len(jobs)) if datasets[i] is None]
+
+    if use_processed and pending:
+        os.makedirs(PROCESSED_PATH, exist_ok=True)
+        stale = [
+            jobs[i]
+            for i in pending
+            if not is_fresh(jobs[i][2], jobs[i][1], fingerprints[i])
+        ]
+        if stale:
+            # the cleaners share no state, so stale ones run side by side and
+            # hand their results back through the store instead of pickling
+            with ProcessPoolExecutor(max_workers=len(stale)) as executor:
+                for rows, (_, _, output_path) in zip(
+                    executor.map(_clean_to_store, *zip(*stale)), stale
+                ):
+                    logger.info(f"Recleaned {rows} rows into {output_path}")
+        for i in pending:
+            datasets[i] = read_frame(jobs[i][2])
+        logger.info("Loaded processed datasets from the store")
+    else:
+        for i in pending:
+            cleaner, raw_path, output_path = jobs[i]
+            datasets[i] = cleaner(
+                raw_path=raw_path, output_path=output_path, export=False
+            )
+    for i in pending:
+        cleaner, raw_path, _ = jobs[i]
+        _cleaned_memo[(cleaner.__name__, raw_path)] = (fingerprints[i], datasets[i])
+    tmdb_df, genres_df, budgets_df = datasets
     logger.info("Cleaning complete on raw datasets. Raw files loaded")
     # Dropping Additional Null Values in Processed Critical Columns
     logger.info("Dropping null values in critical columns")
@@ -182,9 +332,6 @@ def cleaning_and_merging(
     # Assigning movie_id for Budgets
     budgets_df = assign_budget_movie_id(budgets_df, tmdb_df, genres_df)
     logger.info(f"Budget DataFrame cleaned: {budgets_df.shape[0]} rows")
-    # Parsing genre column from string to List[str] format
-    movies_master = fix_genre_strings(movies_master)
-    logger.info("Converted genre strings to lists")
     # Making the Movies-Genre Pivot Table
     genre_table = create_genre_table(movies_master)
     logger.info(f"Genre table constructed with {len(genre_table)} genres")
@@ -197,8 +344,6 @@ def cleaning_and_merging(
         movies_master.to_csv(TMDB_OUTPUT_PATH, index=False)
         genre_table.to_csv(GENRES_OUTPUT_PATH, index=False)
         budgets_df.to_csv(BUDGET_OUTPUT_PATH, index=False)
-        movie_genre_pivot.to_csv(
-            os.path.join(PROCESSED_PATH, "movie_genre_links.csv"), index=False
-        )
+        movie_genre_pivot.to_csv(MOVIE_GENRE_LINKS_PATH, index=False)
     logger.info("Cleaning and merging stage complete")
     return movies_master, budgets_df, genre_table, movie_genre_pivot
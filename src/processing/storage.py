@@ -0,0 +1,281 @@
+## NATIVE-FORMAT STORE FOR PROCESSED DATASETS ##
+import os
+import json
+import glob
+import hashlib
+import importlib.util
+from datetime import datetime, timezone
+from typing import Iterable
+import pandas as pd
+from src.utils.logging import setup_logger
+
+# Parquet needs pyarrow (a declared dependency); installs without it fall back to
+# pickle, which also keeps lists intact
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+STORE_EXTENSION = ".parquet" if PARQUET_AVAILABLE else ".pkl"
+MANIFEST_SUFFIX = ".manifest.json"
+# low-cardinality string columns stored dictionary-encoded (read back as categoricals)
+DICTIONARY_COLUMNS = ["genre", "genre_name", "certificate", "decade", "language"]
+# whole-number columns that pick up a float dtype from missing values
+NULLABLE_INT_COLUMNS = ["year", "votes", "runtime", "budget", "worldwide_gross"]
+
+
+def store_path(path: str) -> str:
+    """
+    Maps a processed CSV path to its native-format counterpart
+    (e.g., 'data/processed/tmdb.csv' -> 'data/processed/tmdb.parquet')
+    """
+    return os.path.splitext(path)[0] + STORE_EXTENSION
+
+
+def manifest_path(path: str) -> str:
+    """
+    Maps a processed dataset path to its manifest
+    (e.g., 'data/processed/tmdb.csv' -> 'data/processed/tmdb.manifest.json')
+    """
+    return os.path.splitext(path)[0] + MANIFEST_SUFFIX
+
+
+def hash_file(path: str) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's contents
+    """
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def fingerprint_inputs(path: str, pattern: str = "*.csv") -> str:
+    """
+    Fingerprints a raw input file or folder by hashing each file's name and
+    contents, so any added, removed or edited input changes the result
+    ---
+    Args:
+        path (str): raw input file or folder
+        pattern (str): glob pattern of the input files within a folder
+    Returns:
+        str: SHA-256 hex digest over the sorted inputs
+    """
+    files = (
+        sorted(glob.glob(os.path.join(path, pattern)))
+        if os.path.isdir(path)
+        else [path]
+    )
+    digest = hashlib.sha256()
+    for file in files:
+        if os.path.isfile(file):
+            digest.update(os.path.basename(file).encode("utf-8"))
+            digest.update(hash_file(file).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _encode_for_store(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the low-cardinality string columns in DICTIONARY_COLUMNS to
+    categoricals so Parquet stores them as dictionary arrays (and they read
+    back as categoricals), and whole-number float columns to nullable Int64.
+    Other string columns keep the dtype the CSV path gives them
+    """
+    encoded = {}
+    for col in df.columns:
+        if col in NULLABLE_INT_COLUMNS and pd.api.types.is_float_dtype(df[col].dtype):
+            values = df[col].dropna()
+            if values.eq(values.round()).all():
+                encoded[col] = df[col].astype("Int64")
+        elif col in DICTIONARY_COLUMNS and (
+            df[col].dtype == object or pd.api.types.is_string_dtype(df[col].dtype)
+        ):
+            values = df[col]
+            # list columns are left to Parquet's nested types
+            if values.map(type).eq(list).any():
+                continue
+            encoded[col] = values.astype("category")
+    return df.assign(**encoded) if encoded else df
+
+
+def write_frame(df: pd.DataFrame, path: str, source: str = None) -> str:
+    """
+    Writes a DataFrame in a format that keeps list, categorical and nullable
+    integer columns intact, so the next stage needs no string re-parsing.
+    Known low-cardinality strings are dictionary-encoded, and a manifest records the
+    row count, the content hash of the stored file and (optionally) the
+    fingerprint of the raw inputs it was cleaned from
+    ---
+    Args:
+        df (pd.DataFrame): DataFrame to store
+        path (str): processed CSV path (or store path) of the dataset
+        source (str): raw input file or folder the dataset was built from
+    Returns:
+        str: the path written
+    """
+    logger = setup_logger("processed_store", "process_datasets")
+    target = store_path(path)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    if PARQUET_AVAILABLE:
+        _encode_for_store(df).to_parquet(target, index=False)
+    else:
+        logger.warning("pyarrow is not installed. Storing %s as a pickle", target)
+        df.reset_index(drop=True).to_pickle(target)
+    _write_manifest(path, len(df), source)
+    logger.info("Stored %d rows to %s", len(df), target)
+    return target
+
+
+def write_frame_chunks(
+    chunks: Iterable[pd.DataFrame], path: str, source: str = None
+) -> int:
+    """
+    Streams DataFrame chunks into the store one at a time through a Parquet
+    writer, so memory stays bounded by the chunk size rather than the output.
+    The file's schema is taken from the first chunk (widened by _stream_schema)
+    and later chunks are cast to it. The manifest is written from the finished file
+    ---
+    Args:
+        chunks (Iterable[pd.DataFrame]): DataFrame chunks with the same columns
+        path (str): processed CSV path (or store path) of the dataset
+        source (str): raw input file or folder the dataset was built from
+    Returns:
+        int: number of rows written
+    """
+    logger = setup_logger("processed_store", "process_datasets")
+    if not PARQUET_AVAILABLE:
+        # pickles cannot be appended to, so the chunks are gathered first
+        frames = list(chunks)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        write_frame(df, path, source=source)
+        return len(df)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    target = store_path(path)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    writer = None
+    rows = 0
+    try:
+        for chunk in chunks:
+            encoded = _encode_for_store(chunk)
+            if writer is None:
+                schema = _stream_schema(
+                    pa.Schema.from_pandas(encoded, preserve_index=False)
+                )
+                writer = pq.ParquetWriter(target, schema)
+            writer.write_table(
+                pa.Table.from_pandas(encoded, schema=schema, preserve_index=False)
+            )
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        # no chunks: an empty frame keeps the store and manifest consistent
+        write_frame(pd.DataFrame(), path, source=source)
+        return 0
+    _write_manifest(path, rows, source)
+    logger.info("Streamed %d rows to %s", rows, target)
+    return rows
+
+
+def _stream_schema(schema):
+    """
+    Widens a first chunk's Arrow schema so later chunks fit it: dictionary
+    indices become int32 (chunks hold different category counts) and all-null
+    columns (or dictionaries) become strings
+    """
+    import pyarrow as pa
+
+    fields = []
+    for field in schema:
+        if pa.types.is_dictionary(field.type):
+            values = field.type.value_type
+            field = field.with_type(
+                pa.dictionary(
+                    pa.int32(),
+                    pa.string() if pa.types.is_null(values) else values,
+                    ordered=field.type.ordered,
+                )
+            )
+        elif pa.types.is_null(field.type):
+            field = field.with_type(pa.string())
+        fields.append(field)
+    return pa.schema(fields, metadata=schema.metadata)
+
+
+def _write_manifest(path: str, rows: int, source: str = None) -> None:
+    """
+    Records the row count, the content hash of the stored file and the
+    fingerprint of the raw inputs next to a stored dataset
+    """
+    target = store_path(path)
+    manifest = {
+        "path": target,
+        "rows": rows,
+        "sha256": hash_file(target),
+        "source": source,
+        "source_fingerprint": fingerprint_inputs(source) if source else None,
+        "written_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    with open(manifest_path(path), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return
+
+
+def read_manifest(path: str) -> dict | None:
+    """
+    Returns the manifest of a stored dataset, or None if it has none
+    """
+    try:
+        with open(manifest_path(path)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def is_fresh(path: str, source: str, fingerprint: str = None) -> bool:
+    """
+    Returns True if the stored dataset is intact (its content hash matches the
+    manifest) and was built from raw inputs identical to the current ones
+    ---
+    Args:
+        path (str): processed CSV path (or store path) of the dataset
+        source (str): raw input file or folder the dataset is built from
+        fingerprint (str): precomputed fingerprint of source, if already known
+    Returns:
+        bool: whether the stored dataset can be used instead of recleaning
+    """
+    manifest = read_manifest(path)
+    if manifest is None or not frame_exists(path):
+        return False
+    fingerprint = fingerprint or fingerprint_inputs(source)
+    if manifest.get("source_fingerprint") != fingerprint:
+        return False
+    return manifest.get("sha256") == hash_file(store_path(path))
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """
+    Reads a DataFrame written by write_frame
+    ---
+    Args:
+        path (str): processed CSV path (or store path) of the dataset
+    Returns:
+        pd.DataFrame: the stored DataFrame
+    """
+    target = store_path(path)
+    if not PARQUET_AVAILABLE:
+        return pd.read_pickle(target)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(target)
+    df = table.to_pandas()
+    # list columns come back as numpy arrays per cell; rebuild plain lists in C
+    for field in table.schema:
+        if pa.types.is_list(field.type) or pa.types.is_large_list(field.type):
+            df[field.name] = table.column(field.name).to_pylist()
+    return df
+
+
+def frame_exists(path: str) -> bool:
+    """
+    Returns True if the dataset has been written to the store
+    """
+    return os.path.exists(store_path(path))
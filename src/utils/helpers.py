@@ -13,12 +13,22 @@ TMDB_RAW_PATH = os.path.join(RAW_PATH, "tmdb_movies")
 BUDGET_RAW_PATH = os.path.join(RAW_PATH, "budgets")
 ## DATA/RAW/FILE
 BUDGET_RAW_FILE = os.path.join(BUDGET_RAW_PATH, "budgets.csv")
+BUDGET_PAGE_CACHE_PATH = os.path.join(RAW_PATH, "page_cache")
 
 PROCESSED_PATH = os.path.join(PATH_DATA, PROCESSED_DATA)
 # DATA/PROCESSED/* Paths
 GENRES_OUTPUT_PATH = os.path.join(PROCESSED_PATH, "genres.csv")
 TMDB_OUTPUT_PATH = os.path.join(PROCESSED_PATH, "tmdb.csv")
 BUDGET_OUTPUT_PATH = os.path.join(PROCESSED_PATH, "budgets.csv")
+# Merged tables handed from the merge stage to the database load stage
+MERGED_MOVIES_PATH = os.path.join(PROCESSED_PATH, "merged_movies.csv")
+MERGED_BUDGETS_PATH = os.path.join(PROCESSED_PATH, "merged_budgets.csv")
+GENRE_TABLE_PATH = os.path.join(PROCESSED_PATH, "genre_table.csv")
+MOVIE_GENRE_LINKS_PATH = os.path.join(PROCESSED_PATH, "movie_genre_links.csv")
+# Budgets recovered by fuzzy title matching (for review)
+FUZZY_MATCH_REPORT_PATH = os.path.join(PROCESSED_PATH, "fuzzy_budget_matches.csv")
+# Stage fingerprints of the last pipeline run
+PIPELINE_MANIFEST_PATH = os.path.join(PATH_DATA, "pipeline_manifest.json")
 
 # Kaggle IDs (username/dataset)
 KAGGLE_TMDB = "asaniczka/tmdb-movies-dataset-2023-930k-movies"
@@ -27,6 +37,25 @@ KAGGLE_IMDB = "rajugc/imdb-movies-dataset-based-on-genre"
 # Movie Database Path
 MOVIZ_DB_PATH = os.path.join(PROCESSED_PATH, "moviz_db.sqlite")
 MOVIE_DB_PATH = "data/processedmovies.sqlite"
+# Max open read connections per database in the dashboard connection pool
+DB_POOL_SIZE = 8
+# Dashboard aggregation (bins per numeric axis; scatters above the point cap become heatmaps)
+HISTOGRAM_BINS = 50
+SCATTER_MAX_POINTS = 5_000
+# Memory budget of the dashboard's server-side query result cache
+RESULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Supported Release Years and their Decade Labels (in chronological order)
+YEAR_MIN = 1880
+YEAR_MAX = 2025
+DECADE_LABELS = [
+    f"{start}–{start + 9}" for start in range(YEAR_MIN // 10 * 10, YEAR_MAX + 1, 10)
+]
+
+# Fuzzy Title Matching (minimum similarity, max release-year gap, blocking n-gram length)
+FUZZY_MATCH_THRESHOLD = 0.9
+FUZZY_YEAR_WINDOW = 1
+FUZZY_GRAM_SIZE = 3
 
 # Columns to Drop
 GENRE_COLS_TO_DROP = [
@@ -140,6 +169,26 @@ PRUNED_BUDGET_COLS = [
     "worldwide_gross",
 ]
 
+# Raw TMDb columns read only for row filtering (not kept after pruning)
+TMDB_FILTER_COLS = ["status", "adult"]
+
+# Read-time dtypes for raw TMDb columns (nullable ints, categorical low-cardinality text)
+TMDB_READ_DTYPES = {
+    "imdb_id": "str",
+    "title": "str",
+    "release_date": "str",
+    "vote_average": "float64",
+    "vote_count": "Int64",
+    "runtime": "Int64",
+    "budget": "Int64",
+    "revenue": "Int64",
+    "status": "category",
+    "adult": "boolean",
+    "genres": "str",
+    "overview": "str",
+    "production_countries": "category",
+}
+
 # Critical Columns (for Merge)
 TMDB_CRIT_COLS = ["movie_id", "title", "normalized_title", "year", "decade"]
 GENRES_CRIT_COLS = ["movie_id", "title", "normalized_title", "year", "decade"]
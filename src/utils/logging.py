@@ -1,5 +1,6 @@
 import os
 import glob
+import time
 import logging
 from src.utils.helpers import LOGS_DATA
 
@@ -39,6 +40,63 @@ def setup_logger(name: str, log_file: str, level=logging.INFO):
     return logger
 
 
+class ProgressLogger:
+    """
+    Batched, rate-limited progress reporting for long-running loops. Progress is
+    logged at most once every 'every_rows' rows or 'every_seconds' seconds
+    (whichever comes first), with throughput, instead of once per row
+    """
+
+    def __init__(
+        self,
+        logger: logging.Logger,
+        label: str,
+        total: int = None,
+        every_rows: int = 100_000,
+        every_seconds: float = 5.0,
+    ):
+        self.logger = logger
+        self.label = label
+        self.total = total
+        self.every_rows = every_rows
+        self.every_seconds = every_seconds
+        self.count = 0
+        self._start = time.perf_counter()
+        self._last_count = 0
+        self._last_time = self._start
+
+    def update(self, n: int) -> None:
+        """
+        Records n processed rows, logging only when a row or time threshold is crossed
+        """
+        self.count += n
+        now = time.perf_counter()
+        if (
+            self.count - self._last_count >= self.every_rows
+            or now - self._last_time >= self.every_seconds
+        ):
+            rate = (self.count - self._last_count) / max(now - self._last_time, 1e-9)
+            progress = f"{self.count}/{self.total}" if self.total else f"{self.count}"
+            self.logger.info(f"{self.label}: {progress} rows ({rate:,.0f} rows/sec)")
+            self._last_count = self.count
+            self._last_time = now
+        return
+
+    def finish(self) -> float:
+        """
+        Logs the final row count and overall throughput
+        ---
+        Returns:
+            float: total elapsed seconds
+        """
+        elapsed = time.perf_counter() - self._start
+        rate = self.count / elapsed if elapsed > 0 else float(self.count)
+        self.logger.info(
+            f"{self.label}: {self.count} rows in {elapsed:.2f}s ({rate:,.0f} rows/sec)"
+        )
+        return elapsed
+
+
 def logs_exist(log_dir=LOGS_DATA) -> bool:
     """
     Returns True if any .log file in the logs directory is non-empty
@@ -0,0 +1,259 @@
+## STAGE GRAPH WITH CONTENT-HASH SKIPPING ##
+import os
+import json
+import time
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+from graphlib import TopologicalSorter
+from types import ModuleType
+from typing import Callable
+from src.utils.helpers import PIPELINE_MANIFEST_PATH
+from src.utils.logging import setup_logger
+from src.processing.storage import fingerprint_inputs, hash_file
+
+# independent stages run concurrently in up to this many worker processes
+MAX_WORKERS = 4
+
+
+def code_version(modules: list[ModuleType]) -> str:
+    """
+    Hashes the source files of the modules a stage runs, so editing the
+    stage's code invalidates its fingerprint
+    ---
+    Args:
+        modules (list[ModuleType]): modules implementing the stage
+    Returns:
+        str: SHA-256 hex digest over the module sources
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        digest.update(module.__name__.encode("utf-8"))
+        digest.update(hash_file(inspect.getsourcefile(module)).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _run_stage(func: Callable, params: dict) -> float:
+    """
+    Runs a stage in a worker process and returns its wall time. The stage's
+    return value is discarded: results travel between stages through their
+    output files, so no DataFrame is pickled back to the parent
+    """
+    start = time.perf_counter()
+    func(**params)
+    return time.perf_counter() - start
+
+
+def format_timings(results: dict) -> str:
+    """
+    Formats per-stage results as a fixed-width table of status and wall time
+    ---
+    Args:
+        results (dict): stage name -> {'status', 'seconds'}
+    Returns:
+        str: the table
+    """
+    width = max([len("stage"), *(len(name) for name in results)])
+    lines = [f"{'stage':<{width}}  {'status':<7}  {'seconds':>8}"]
+    lines.append("-" * len(lines[0]))
+    for name, result in results.items():
+        lines.append(
+            f"{name:<{width}}  {result['status']:<7}  {result['seconds']:>8.2f}"
+        )
+    total = sum(result["seconds"] for result in results.values())
+    lines.append("-" * len(lines[0]))
+    lines.append(f"{'sum':<{width}}  {'':<7}  {total:>8.2f}")
+    return "\n".join(lines)
+
+
+class Stage:
+    """
+    A single pipeline step. Its fingerprint combines the content hashes of its
+    input files, the source of its code and its parameters; the stage is
+    skipped when that fingerprint matches the last successful run and all of
+    its outputs still exist
+    ---
+    Args:
+        name (str): unique stage name
+        func (Callable): runs the stage (called with **params)
+        inputs (list[str]): files or folders the stage reads
+        outputs (list[str]): files or folders the stage writes
+        depends_on (list[str]): names of the stages that must run first
+        params (dict): keyword arguments passed to func, part of the fingerprint
+        code (list[ModuleType]): modules whose source is part of the fingerprint
+        always_run (bool): never skip (e.g., for remote sources that cannot be hashed)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        inputs: list[str] = None,
+        outputs: list[str] = None,
+        depends_on: list[str] = None,
+        params: dict = None,
+        code: list[ModuleType] = None,
+        always_run: bool = False,
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = inputs or []
+        self.outputs = outputs or []
+        self.depends_on = depends_on or []
+        self.params = params or {}
+        self.code = code or []
+        self.always_run = always_run
+
+    def fingerprint(self) -> str:
+        """
+        Returns the SHA-256 of the stage's inputs, code version and parameters
+        """
+        digest = hashlib.sha256(self.name.encode("utf-8"))
+        for path in self.inputs:
+            digest.update(path.encode("utf-8"))
+            digest.update(fingerprint_inputs(path).encode("ascii"))
+        digest.update(code_version(self.code).encode("ascii"))
+        digest.update(json.dumps(self.params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def outputs_exist(self) -> bool:
+        """
+        Returns True if every declared output is present
+        """
+        return all(os.path.exists(path) for path in self.outputs)
+
+
+class Pipeline:
+    """
+    Runs stages in dependency order, skipping those whose fingerprint is
+    unchanged since their last successful run and running independent stages
+    in parallel. Fingerprints are kept in a small JSON manifest
+    ---
+    Args:
+        stages (list[Stage]): the stages of the pipeline
+        manifest_path (str): path of the fingerprint manifest
+    """
+
+    def __init__(
+        self, stages: list[Stage], manifest_path: str = PIPELINE_MANIFEST_PATH
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.manifest_path = manifest_path
+        self.logger = setup_logger("pipeline", "pipeline")
+
+    def read_manifest(self) -> dict:
+        """
+        Returns the recorded stage runs, or an empty dict if there are none
+        """
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        os.makedirs(os.path.dirname(self.manifest_path) or ".", exist_ok=True)
+        # writes then renames so an interrupted run never leaves a corrupt manifest
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+        return
+
+    def order(self) -> list[str]:
+        """
+        Returns the stage names in dependency order
+        """
+        graph = {name: stage.depends_on for name, stage in self.stages.items()}
+        return list(TopologicalSorter(graph).static_order())
+
+    def is_complete(self, name: str) -> bool:
+        """
+        Returns True if the stage has a recorded successful run and its outputs exist
+        """
+        return name in self.read_manifest() and self.stages[name].outputs_exist()
+
+    def _should_skip(self, stage: Stage, fingerprint: str, manifest: dict) -> bool:
+        recorded = manifest.get(stage.name, {}).get("fingerprint")
+        return (
+            not stage.always_run and recorded == fingerprint and stage.outputs_exist()
+        )
+
+    def run(
+        self,
+        force: bool = False,
+        force_stages: list[str] = None,
+        max_workers: int = MAX_WORKERS,
+    ) -> dict:
+        """
+        Runs every stage whose fingerprint changed (or all stages with force).
+        Stages start as soon as their dependencies finish, so independent
+        stages run concurrently in a process pool. A stage's fingerprint is
+        taken when it becomes ready, after its upstream outputs are written
+        ---
+        Args:
+            force (bool): rerun every stage regardless of its fingerprint
+            force_stages (list[str]): stages to rerun regardless of their
+                fingerprint (e.g., a load whose output failed a check)
+            max_workers (int): maximum number of concurrent stage processes
+        Returns:
+            dict: stage name -> {'status': 'ran' or 'skipped', 'seconds': wall time}
+        """
+        unknown = set(force_stages or []) - set(self.stages)
+        if unknown:
+            raise ValueError(f"Unknown stages: {sorted(unknown)}")
+        manifest = self.read_manifest()
+        results = {}
+        sorter = TopologicalSorter(
+            {name: stage.depends_on for name, stage in self.stages.items()}
+        )
+        sorter.prepare()
+        running = {}
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            while sorter.is_active():
+                for name in sorter.get_ready():
+                    stage = self.stages[name]
+                    fingerprint = stage.fingerprint()
+                    forced = force or name in (force_stages or [])
+                    if not forced and self._should_skip(stage, fingerprint, manifest):
+                        self.logger.info(f"Stage '{name}' unchanged. Skipped")
+                        print(f"  [skip] {name}")
+                        results[name] = {"status": "skipped", "seconds": 0.0}
+                        sorter.done(name)
+                        continue
+                    print(f"  [run]  {name}")
+                    for path in stage.outputs:
+                        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    future = executor.submit(_run_stage, stage.func, stage.params)
+                    running[future] = (name, fingerprint)
+                if not running:
+                    # skipped stages may have unblocked others; collect them first
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name, fingerprint = running.pop(future)
+                    elapsed = future.result()
+                    self.logger.info(f"Stage '{name}' completed in {elapsed:.2f}s")
+                    # records each stage as it finishes so a failed run resumes where it stopped
+                    manifest[name] = {
+                        "fingerprint": fingerprint,
+                        "seconds": round(elapsed, 3),
+                        "completed_at": datetime.now(timezone.utc).isoformat(
+                            timespec="seconds"
+                        ),
+                    }
+                    self._write_manifest(manifest)
+                    results[name] = {"status": "ran", "seconds": elapsed}
+                    sorter.done(name)
+
+        results = {name: results[name] for name in self.order()}
+        table = format_timings(results)
+        self.logger.info(
+            f"Pipeline finished in {time.perf_counter() - start:.2f}s\n{table}"
+        )
+        print(table)
+        print(f"Wall time: {time.perf_counter() - start:.2f}s")
+        return results
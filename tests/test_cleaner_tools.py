@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from src.processing.cleaner_tools import label_decades, parse_money
+from src.utils.helpers import DECADE_LABELS
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("$1,250,000", 1_250_000),
+        ("\xa0$5 ", 5),
+        ("$0", 0),
+        ("$9,223,372,036,854,775,807", 9_223_372_036_854_775_807),
+        ("1.5", pd.NA),
+        ("-$5", pd.NA),
+        ("$1,000 (est.)", pd.NA),
+        ("$99999999999999999999", pd.NA),
+        ("$9,223,372,036,854,775,808", pd.NA),
+        ("", pd.NA),
+        ("$", pd.NA),
+    ],
+)
+def test_parse_money(value, expected):
+    parsed = parse_money([value])
+    assert parsed.dtype == "Int64"
+    if expected is pd.NA:
+        assert parsed.isna().all()
+    else:
+        assert parsed.iloc[0] == expected
+
+
+def test_parse_money_keeps_series_index():
+    values = pd.Series(["$1", "bad", "$3"], index=[10, 20, 30])
+    parsed = parse_money(values)
+    assert list(parsed.index) == [10, 20, 30]
+    assert parsed.tolist() == [1, pd.NA, 3]
+
+
+def test_label_decades():
+    decades = label_decades(pd.Series([1986, None, 2025]))
+    assert decades.iloc[0] == "1980–1989"
+    assert pd.isna(decades.iloc[1])
+    assert decades.iloc[2] == "2020–2029"
+    # the categories span the supported years, in chronological order
+    assert list(decades.cat.categories) == DECADE_LABELS
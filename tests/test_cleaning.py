@@ -0,0 +1,80 @@
+import pandas as pd
+import pytest
+from src.processing.cleaning import clean_tmdb_to_csv
+from src.processing.storage import is_fresh, read_frame, read_manifest
+
+
+@pytest.fixture
+def tmdb_raw(tmp_path):
+    raw_path = tmp_path / "tmdb_movies"
+    raw_path.mkdir()
+    rows = [
+        ("tt01", "Avatar", "2009-12-18", "Action, Adventure", 2_923_706_026),
+        ("tt02", "Memento", "2000-09-05", "Mystery, Thriller", 40_047_236),
+        ("tt03", "Amélie", "2001-04-25", "Comedy, Romance", 174_182_296),
+        ("tt01", "Avatar", "2009-12-18", "Action, Adventure", 2_923_706_026),
+        ("tt04", "Metropolis", "1927-01-10", "Drama, Science Fiction", 1_349_711),
+    ]
+    pd.DataFrame(
+        {
+            "id": range(len(rows)),
+            "title": [row[1] for row in rows],
+            "vote_average": 7.5,
+            "vote_count": 1000,
+            "status": "Released",
+            "release_date": [row[2] for row in rows],
+            "revenue": [row[4] for row in rows],
+            "runtime": 120,
+            "adult": False,
+            "budget": 1_000_000,
+            "imdb_id": [row[0] for row in rows],
+            "original_language": "en",
+            "overview": "Lorem ipsum",
+            "genres": [row[3] for row in rows],
+            "production_countries": "United States of America",
+        }
+    ).to_csv(raw_path / "tmdb.csv", index=False)
+    return str(raw_path)
+
+
+def test_streaming_clean_stores_a_fresh_frame(tmdb_raw, tmp_path):
+    output_path = str(tmp_path / "processed" / "tmdb.csv")
+    (tmp_path / "processed").mkdir()
+    streamed = clean_tmdb_to_csv(
+        raw_path=tmdb_raw, output_path=output_path, chunksize=2
+    )
+    assert is_fresh(output_path, tmdb_raw)
+    stored = read_frame(output_path)
+    assert sorted(stored["movie_id"]) == ["tt01", "tt02", "tt03", "tt04"]
+    assert streamed == len(stored) == len(pd.read_csv(output_path))
+    # genre lists survive the store, unlike the CSV
+    assert list(stored.set_index("movie_id").loc["tt01", "genre"]) == [
+        "Action",
+        "Adventure",
+    ]
+
+
+def test_streaming_and_batch_clean_keep_the_same_movies(tmdb_raw, tmp_path):
+    (tmp_path / "processed").mkdir()
+    batch = clean_tmdb_to_csv(
+        raw_path=tmdb_raw, output_path=str(tmp_path / "processed" / "batch.csv")
+    )
+    streamed_path = str(tmp_path / "processed" / "streamed.csv")
+    clean_tmdb_to_csv(raw_path=tmdb_raw, output_path=streamed_path, chunksize=2)
+    streamed = read_frame(streamed_path)
+    assert sorted(batch["movie_id"]) == sorted(streamed["movie_id"])
+
+
+def test_streaming_clean_holds_one_chunk_at_a_time(tmdb_raw, tmp_path, monkeypatch):
+    # the store is written chunk by chunk, never from one concatenated frame
+    def concat(*args, **kwargs):
+        raise AssertionError("streaming clean concatenated its chunks")
+
+    monkeypatch.setattr(pd, "concat", concat)
+    output_path = str(tmp_path / "processed" / "tmdb.csv")
+    (tmp_path / "processed").mkdir()
+    rows = clean_tmdb_to_csv(raw_path=tmdb_raw, output_path=output_path, chunksize=2)
+    monkeypatch.undo()
+    assert rows == 4
+    assert read_manifest(output_path)["rows"] == 4
+    assert is_fresh(output_path, tmdb_raw)
@@ -0,0 +1,127 @@
+import re
+import sqlite3
+import pandas as pd
+import pytest
+from src.database import pool
+from src.database.database import MovieDB, FILTER_SOURCE
+from src.dash import movie_db
+from src.dash.movie_db import MoVIZ
+
+
+def _movies(n: int) -> pd.DataFrame:
+    certificates = ["G", "PG", "PG-13", "R"]
+    return pd.DataFrame(
+        {
+            "movie_id": [f"tt{i}" for i in range(n)],
+            "title": [f"Movie {i}" for i in range(n)],
+            "normalized_title": [f"movie {i}" for i in range(n)],
+            "release_date": [f"{1950 + i % 70}-01-01" for i in range(n)],
+            "year": [1950 + i % 70 for i in range(n)],
+            "decade": [f"{1950 + i % 70 // 10 * 10}s" for i in range(n)],
+            "certificate": [certificates[i % 4] for i in range(n)],
+            "rating": [i % 100 / 10 for i in range(n)],
+            "votes": [i * 10 for i in range(n)],
+            "runtime": [90 + i % 60 for i in range(n)],
+            "description": [None] * n,
+            "production_countries": ["US"] * n,
+        }
+    )
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # BaseDB.check_exists walks relative paths
+    monkeypatch.chdir(tmp_path)
+    # pools are shared per path, so each test starts without any
+    monkeypatch.setattr(pool, "_pools", {})
+    path = "movies.sqlite"
+    monkeypatch.setattr(MovieDB, "PATH", path)
+    n = 400
+    movies = _movies(n)
+    budgets = pd.DataFrame(
+        {
+            "movie_id": movies["movie_id"],
+            "production_budget": [1_000_000 * (i + 1) for i in range(n)],
+            "domestic_gross": [2_000_000 * (i + 1) for i in range(n)],
+            "worldwide_gross": [3_000_000 * (i + 1) for i in range(n)],
+        }
+    )
+    genres = pd.DataFrame(
+        {"genre_id": range(8), "genre_name": [f"Genre {i}" for i in range(8)]}
+    )
+    links = pd.DataFrame(
+        {"movie_id": movies["movie_id"], "genre_id": [i % 8 for i in range(n)]}
+    )
+    MovieDB(create=True, build=True).load_from_dataframes(
+        movies, budgets, genres, links
+    )
+    return path
+
+
+def _tables(path: str) -> set:
+    with sqlite3.connect(path) as conn:
+        return {
+            name
+            for (name,) in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table';"
+            )
+        }
+
+
+def test_facet_stats_are_rebuilt_on_databases_without_the_table(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE tFacetStats;")
+    db = MovieDB()
+    db._connect()
+    db._build_facet_stats(keep_open=True)
+    db._conn.commit()
+    db._close()
+    with sqlite3.connect(db_path) as conn:
+        names = [
+            name for (name,) in conn.execute("SELECT column_name FROM tFacetStats")
+        ]
+    assert sorted(names) == sorted(MovieDB.FACETS)
+
+
+def test_summary_facets_fall_back_only_when_the_table_is_missing(db_path, monkeypatch):
+    monkeypatch.setattr(movie_db, "MOVIE_DB_PATH", db_path)
+    moviz = MoVIZ()
+    assert set(moviz._summary_facets(["rating"])) == {"rating"}
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE tFacetStats;")
+    assert "tFacetStats" not in _tables(db_path)
+    assert moviz._summary_facets(["rating"]) == {}
+
+
+def test_dashboard_leaves_building_derived_tables_to_the_load_stage(
+    db_path, monkeypatch
+):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE tMovieAnalytics;")
+        conn.execute("DROP TABLE tFacetStats;")
+    monkeypatch.setattr(movie_db, "MOVIE_DB_PATH", db_path)
+    MoVIZ()
+    assert not {"tMovieAnalytics", "tFacetStats"} & _tables(db_path)
+    missing = MovieDB().missing_schema()
+    assert missing == MovieDB.DERIVED_TABLES + list(MovieDB.ANALYTICS_INDEXES)
+
+
+def test_dashboard_leaves_index_migration_to_the_load_stage(db_path, monkeypatch):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP INDEX idx_analytics_rating;")
+    monkeypatch.setattr(movie_db, "MOVIE_DB_PATH", db_path)
+    MoVIZ()
+    assert MovieDB().missing_schema() == ["idx_analytics_rating"]
+
+
+@pytest.mark.parametrize("name", list(MovieDB.PLAN_CHECKS))
+def test_filter_predicates_search_an_index(db_path, name):
+    predicate = MovieDB.PLAN_CHECKS[name]
+    sql = f"EXPLAIN QUERY PLAN SELECT COUNT(*) {FILTER_SOURCE} WHERE {predicate}"
+    with sqlite3.connect(db_path) as conn:
+        plan = [row[-1] for row in conn.execute(sql, [None] * predicate.count("?"))]
+    assert not any(step.startswith("SCAN") for step in plan), plan
+    assert any(
+        re.match(r"SEARCH tMovieAnalytics USING (COVERING )?INDEX", step)
+        for step in plan
+    ), plan
@@ -0,0 +1,58 @@
+import os
+import pytest
+import src.downloading.downloading as downloading
+from src.downloading.downloading import download_kaggle_dataset, read_version_marker
+
+
+@pytest.fixture
+def kaggle(tmp_path, monkeypatch):
+    """
+    Fakes kagglehub's cache: publish() adds a dataset version with the given CSVs
+    """
+    state = {"latest": None, "online": True, "versions": 0}
+
+    def publish(files: dict) -> None:
+        state["versions"] += 1
+        version = tmp_path / "cache" / "versions" / str(state["versions"])
+        version.mkdir(parents=True)
+        for name, text in files.items():
+            (version / name).write_text(text)
+        state["latest"] = str(version)
+
+    def dataset_download(kaggle_id: str) -> str:
+        if not state["online"]:
+            raise ConnectionError("offline")
+        return state["latest"]
+
+    monkeypatch.setattr(downloading.kagglehub, "dataset_download", dataset_download)
+    return publish, state
+
+
+def test_new_versions_replace_only_changed_files(kaggle, tmp_path):
+    publish, _ = kaggle
+    output_dir = str(tmp_path / "raw")
+    publish({"a.csv": "x\n1\n", "b.csv": "y\n1\n"})
+    download_kaggle_dataset("owner/data", output_dir)
+    assert read_version_marker(output_dir)["version"] == "1"
+    unchanged_mtime = os.path.getmtime(os.path.join(output_dir, "a.csv"))
+
+    publish({"a.csv": "x\n1\n", "b.csv": "y\n2\n"})
+    download_kaggle_dataset("owner/data", output_dir)
+    assert read_version_marker(output_dir)["version"] == "2"
+    with open(os.path.join(output_dir, "b.csv")) as f:
+        assert f.read() == "y\n2\n"
+    assert os.path.getmtime(os.path.join(output_dir, "a.csv")) == unchanged_mtime
+
+
+def test_offline_run_keeps_the_local_copy(kaggle, tmp_path):
+    publish, state = kaggle
+    output_dir = str(tmp_path / "raw")
+    publish({"a.csv": "x\n1\n"})
+    download_kaggle_dataset("owner/data", output_dir)
+
+    state["online"] = False
+    download_kaggle_dataset("owner/data", output_dir)
+    assert read_version_marker(output_dir)["version"] == "1"
+    # without a local copy there is nothing to fall back on
+    with pytest.raises(ConnectionError):
+        download_kaggle_dataset("owner/data", str(tmp_path / "empty"))
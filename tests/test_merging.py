@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+from src.processing.merging import assign_budget_movie_id
+
+
+def _movies(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(rows, columns=["movie_id", "normalized_title", "year"])
+
+
+def _budgets(rows: list[tuple]) -> pd.DataFrame:
+    return pd.DataFrame(
+        [(title, title.lower(), year, budget) for title, year, budget in rows],
+        columns=["title", "normalized_title", "year", "production_budget"],
+    )
+
+
+@pytest.fixture
+def tmdb_df():
+    return _movies([("tt1", "avatar", 2009), ("tt2", "memento", 2000)])
+
+
+@pytest.fixture
+def genres_df():
+    # the genres dataset lists Avatar a year later under the same id
+    return _movies([("tt1", "avatar", 2010), ("tt3", "metropolis", 1927)])
+
+
+def test_fuzzy_match_skips_movies_taken_by_exact_matches(tmdb_df, genres_df):
+    budgets = _budgets([("Avatar", 2009, 237), ("Avatarr", 2009, 1)])
+    merged = assign_budget_movie_id(budgets, tmdb_df, genres_df, report_path=None)
+    assert merged["movie_id"].tolist() == ["tt1"]
+    assert merged["production_budget"].tolist() == [237]
+
+
+def test_fuzzy_match_still_recovers_untaken_movies(tmdb_df, genres_df, tmp_path):
+    report_path = tmp_path / "fuzzy.csv"
+    budgets = _budgets([("Avatar", 2009, 237), ("Mementoo", 2000, 9)])
+    merged = assign_budget_movie_id(
+        budgets, tmdb_df, genres_df, report_path=str(report_path)
+    )
+    assert sorted(merged["movie_id"]) == ["tt1", "tt2"]
+    assert pd.read_csv(report_path)["title"].tolist() == ["Mementoo"]
+
+
+def test_each_movie_keeps_a_single_budget(tmdb_df, genres_df):
+    # both keys resolve exactly to tt1 (through TMDB and through genres)
+    budgets = _budgets([("Avatar", 2010, 1), ("Avatar", 2009, 237)])
+    merged = assign_budget_movie_id(budgets, tmdb_df, genres_df, report_path=None)
+    assert merged["movie_id"].is_unique
+    # the TMDB match outranks the genres match
+    assert merged["production_budget"].tolist() == [237]
@@ -0,0 +1,32 @@
+import pytest
+from src.utils.pipeline import Stage, Pipeline
+
+
+def _append(path: str) -> None:
+    with open(path, "a") as f:
+        f.write("ran\n")
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    output = str(tmp_path / "load.txt")
+    stage = Stage("load", _append, outputs=[output], params={"path": output})
+    return Pipeline([stage], manifest_path=str(tmp_path / "manifest.json"))
+
+
+def test_unchanged_stage_is_skipped(pipeline):
+    assert pipeline.run(max_workers=1)["load"]["status"] == "ran"
+    assert pipeline.run(max_workers=1)["load"]["status"] == "skipped"
+
+
+def test_forced_stage_reruns_with_an_unchanged_fingerprint(pipeline):
+    pipeline.run(max_workers=1)
+    results = pipeline.run(force_stages=["load"], max_workers=1)
+    assert results["load"]["status"] == "ran"
+    with open(pipeline.stages["load"].params["path"]) as f:
+        assert f.read().count("ran") == 2
+
+
+def test_forcing_an_unknown_stage_is_rejected(pipeline):
+    with pytest.raises(ValueError):
+        pipeline.run(force_stages=["lood"], max_workers=1)
@@ -0,0 +1,61 @@
+import time
+import sqlite3
+import threading
+import pytest
+from src.database.pool import ConnectionPool
+
+
+@pytest.fixture
+def pool(tmp_path):
+    path = tmp_path / "pool.sqlite"
+    sqlite3.connect(path).close()
+    pool = ConnectionPool(str(path), size=3)
+    yield pool
+    pool.close()
+
+
+def _read(pool: ConnectionPool, seen: list, hold: float = 0.0) -> None:
+    with pool.reader() as conn:
+        conn.execute("SELECT 1;").fetchone()
+        seen.append(id(conn))
+        time.sleep(hold)
+
+
+def test_reader_reuses_connections_across_short_lived_threads(pool):
+    seen = []
+    # one thread per request, as the Dash dev server does
+    for _ in range(50):
+        thread = threading.Thread(target=_read, args=(pool, seen))
+        thread.start()
+        thread.join()
+    stats = pool.stats()
+    assert len(seen) == 50
+    assert len(set(seen)) == 1
+    assert stats["misses"] == 1
+    assert stats["hits"] == 49
+    assert stats["open_readers"] == 1
+
+
+def test_reader_stays_bounded_under_concurrency(pool):
+    seen = []
+    # more concurrent threads than connections: extra threads wait their turn
+    threads = [
+        threading.Thread(target=_read, args=(pool, seen, 0.02)) for _ in range(20)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(seen) == 20
+    assert len(set(seen)) <= pool.size
+    assert pool.stats()["open_readers"] <= pool.size
+
+
+def test_close_discards_checked_out_connections(pool):
+    with pool.reader() as conn:
+        pool.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1;")
+    with pool.reader() as fresh:
+        assert fresh.execute("SELECT 1;").fetchone() == (1,)
+    assert pool.stats()["open_readers"] == 1
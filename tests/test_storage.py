@@ -0,0 +1,63 @@
+import io
+import pandas as pd
+import pytest
+from src.processing.storage import (
+    PARQUET_AVAILABLE,
+    is_fresh,
+    read_frame,
+    read_manifest,
+    write_frame,
+    write_frame_chunks,
+)
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame(
+        {
+            "movie_id": ["tt01", "tt02", "tt03", "tt04"],
+            # repeated titles and dates must not turn into categoricals
+            "title": ["Dune", "Dune", "Dune", "Heat"],
+            "release_date": ["2021-10-22"] * 3 + ["1995-12-15"],
+            "certificate": ["PG-13", "PG-13", "R", None],
+            "year": [2021.0, 2021.0, None, 1995.0],
+            "genre": [["Drama"], ["Drama", "Sci-Fi"], [], ["Crime"]],
+        }
+    )
+
+
+def test_round_trip_keeps_csv_dtypes(frame, tmp_path):
+    path = str(tmp_path / "movies.csv")
+    write_frame(frame, path)
+    stored = read_frame(path)
+    csv = pd.read_csv(io.StringIO(frame.to_csv(index=False)))
+    for col in ("movie_id", "title", "release_date"):
+        assert stored[col].dtype == csv[col].dtype
+        assert stored[col].tolist() == frame[col].tolist()
+    assert stored["year"].dtype == "Int64"
+    assert stored["genre"].tolist() == frame["genre"].tolist()
+    if PARQUET_AVAILABLE:
+        assert isinstance(stored["certificate"].dtype, pd.CategoricalDtype)
+
+
+def test_manifest_tracks_the_source(frame, tmp_path):
+    source = tmp_path / "raw.csv"
+    source.write_text("a,b\n1,2\n")
+    path = str(tmp_path / "movies.csv")
+    write_frame(frame, path, source=str(source))
+    assert read_manifest(path)["rows"] == len(frame)
+    assert is_fresh(path, str(source))
+    source.write_text("a,b\n1,3\n")
+    assert not is_fresh(path, str(source))
+
+
+def test_chunks_with_different_categories_stream_into_one_store(frame, tmp_path):
+    path = str(tmp_path / "movies.csv")
+    # the first chunk has no certificates and fewer distinct values
+    first, second = frame.iloc[3:].copy(), frame.iloc[:3]
+    first["certificate"] = None
+    rows = write_frame_chunks(iter([first, second]), path)
+    stored = read_frame(path)
+    assert rows == len(stored) == read_manifest(path)["rows"] == 4
+    assert stored["certificate"].tolist()[1:] == ["PG-13", "PG-13", "R"]
+    assert stored["genre"].tolist()[0] == ["Crime"]
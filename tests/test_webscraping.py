@@ -0,0 +1,258 @@
+import os
+import time
+import hashlib
+import threading
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import src.downloading.webscraping as webscraping
+from src.downloading.webscraping import (
+    TokenBucket,
+    fetch_page,
+    make_session,
+    page_url,
+    read_cached_page,
+    webscrape_budgets,
+)
+
+BUDGETS_URL = "https://example.com/budgets"
+PAGE = """<html><body><table>
+<tr><th></th><th>Release Date</th><th>Movie</th><th>Production<br>Budget</th>
+<th>Domestic<br>Gross</th><th>Worldwide<br>Gross</th></tr>
+<tr><td>1</td><td>Dec 18, 2009</td><td>Avatar</td><td>$237,000,000</td>
+<td>$785,221,649</td><td>$2,923,706,026</td></tr>
+<tr><td>2</td><td>Apr 25, 2001</td><td>Memento</td><td>$10,000,000</td>
+<td>$33,225,499</td><td>$174,182,296</td></tr>
+</table></body></html>"""
+
+
+def _etag(html: str) -> str:
+    return '"{}"'.format(hashlib.sha1(html.encode("utf-8")).hexdigest()[:8])
+
+
+class FakeResponse:
+    def __init__(self, text: str, status_code: int = 200, etag: str = None):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = status_code
+        self.headers = {"ETag": etag}
+
+    def raise_for_status(self) -> None:
+        return
+
+
+class FakeSession:
+    """
+    Serves canned pages by URL (PAGE for the first budget page by default),
+    answering 304 when revalidated with a page's current ETag
+    """
+
+    def __init__(self, pages: dict = None):
+        self.pages = pages or {BUDGETS_URL: PAGE}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get(self, url, headers=None, timeout=None):
+        html = self.pages.get(url, "<html></html>")
+        if headers and headers.get("If-None-Match") == _etag(html):
+            return FakeResponse("", status_code=304)
+        return FakeResponse(html, etag=_etag(html))
+
+
+@pytest.fixture
+def scrape(tmp_path, monkeypatch):
+    monkeypatch.setattr(webscraping, "make_session", lambda **kwargs: FakeSession())
+    budget_path = str(tmp_path / "budgets" / "budgets.csv")
+    cache_dir = str(tmp_path / "page_cache")
+
+    def run():
+        return webscrape_budgets(
+            budget_path=budget_path,
+            max_pages=1,
+            base_url=BUDGETS_URL,
+            requests_per_second=1000,
+            cache_dir=cache_dir,
+        )
+
+    return run, budget_path, cache_dir
+
+
+def test_page_is_cached_only_after_its_rows_are_saved(scrape, monkeypatch):
+    run, budget_path, cache_dir = scrape
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, "to_csv", crash)
+    with pytest.raises(OSError):
+        run()
+    assert read_cached_page(cache_dir, BUDGETS_URL) is None
+
+    # the rerun refetches the page instead of revalidating it as unchanged
+    monkeypatch.undo()
+    monkeypatch.setattr(webscraping, "make_session", lambda **kwargs: FakeSession())
+    df = run()
+    assert list(df["Movie"]) == ["Avatar", "Memento"]
+    assert os.path.exists(budget_path)
+    assert read_cached_page(cache_dir, BUDGETS_URL)["etag"] == _etag(PAGE)
+
+
+def test_unchanged_page_is_not_reparsed(scrape):
+    run, budget_path, cache_dir = scrape
+    first = run()
+    second = run()
+    assert len(first) == len(second) == 2
+    assert len(pd.read_csv(budget_path, index_col=0)) == 2
+
+
+def test_parse_budget_page_keeps_non_ascii_titles():
+    page = PAGE.replace("Memento", "Amélie")
+    assert "charset" not in page
+    df = webscraping.parse_budget_page(page)
+    assert list(df["Movie"]) == ["Avatar", "Amélie"]
+    assert list(df["Production Budget"]) == [237_000_000, 10_000_000]
+
+
+def test_unchanged_page_does_not_stop_the_scrape(tmp_path, monkeypatch):
+    # the listing is ranked by budget, so a new film can land on a later page
+    # while the first page still revalidates as unchanged
+    second_url = webscraping.page_url(BUDGETS_URL, 100)
+    pages = {BUDGETS_URL: PAGE, second_url: PAGE.replace("Memento", "Heat")}
+    monkeypatch.setattr(
+        webscraping, "make_session", lambda **kwargs: FakeSession(pages)
+    )
+    budget_path = str(tmp_path / "budgets" / "budgets.csv")
+
+    def run():
+        return webscrape_budgets(
+            budget_path=budget_path,
+            max_pages=2,
+            base_url=BUDGETS_URL,
+            max_workers=1,
+            requests_per_second=1000,
+            cache_dir=str(tmp_path / "page_cache"),
+            early_stop=True,
+        )
+
+    run()
+    pages[second_url] = pages[second_url].replace("Heat", "Ronin")
+    df = run()
+    assert "Ronin" in set(df["Movie"])
+
+
+def _budget_page(start: int, titles: list[str]) -> str:
+    rows = "".join(
+        f"<tr><td>{start + i + 1}</td><td>Jan 1, 2000</td><td>{title}</td>"
+        f"<td>${(i + 1) * 1_000_000:,}</td><td>$1</td><td>$2</td></tr>"
+        for i, title in enumerate(titles)
+    )
+    header = PAGE[: PAGE.index("</tr>") + len("</tr>")]
+    return f"{header}{rows}</table></body></html>"
+
+
+class CannedPages(BaseHTTPRequestHandler):
+    """
+    Serves the server's canned pages by path. A path listed in 'delays' is
+    answered that many seconds late, and one listed in 'failures' answers 503
+    that many times before succeeding. Every request's path and arrival time is
+    logged, as is the order in which successful responses complete
+    """
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, time.monotonic()))
+            failing = server.failures.get(self.path, 0) > 0
+            if failing:
+                server.failures[self.path] -= 1
+        if failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        time.sleep(server.delays.get(self.path, 0))
+        body = server.pages.get(self.path, "<html></html>").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        with server.lock:
+            server.responses.append(self.path)
+
+    def log_message(self, *args):
+        return
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), CannedPages)
+    httpd.pages, httpd.delays, httpd.failures = {}, {}, {}
+    httpd.requests, httpd.responses = [], []
+    httpd.lock = threading.Lock()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}/budgets"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_pages_are_saved_in_page_order_when_responses_arrive_out_of_order(
+    server, tmp_path
+):
+    titles = [["Avatar", "Titanic"], ["Heat", "Ronin"], ["Jaws", "Alien"]]
+    for page, names in enumerate(titles):
+        server.pages[urlsplit(page_url(server.base_url, page * 100)).path] = (
+            _budget_page(page * 100, names)
+        )
+    # the first page answers last
+    server.delays["/budgets"] = 0.3
+    df = webscrape_budgets(
+        budget_path=str(tmp_path / "budgets.csv"),
+        max_pages=3,
+        base_url=server.base_url,
+        max_workers=3,
+        requests_per_second=1000,
+        cache_dir=None,
+    )
+    assert server.responses[-1] == "/budgets"
+    assert list(df["Movie"]) == [name for names in titles for name in names]
+    assert list(df.index) == [1, 2, 101, 102, 201, 202]
+
+
+def test_throttled_page_is_retried(server):
+    server.pages["/budgets"] = PAGE
+    server.failures["/budgets"] = 1
+    with make_session(pool_size=1) as session:
+        page, changed = fetch_page(
+            session, server.base_url, TokenBucket(rate=1000, capacity=1)
+        )
+    assert changed
+    assert "Memento" in page["html"]
+    assert [path for path, _ in server.requests] == ["/budgets", "/budgets"]
+
+
+def test_token_bucket_holds_the_configured_rate(server):
+    server.pages["/budgets"] = PAGE
+    rate, capacity, count = 20.0, 2, 12
+    bucket = TokenBucket(rate=rate, capacity=capacity)
+    with (
+        make_session(pool_size=4) as session,
+        ThreadPoolExecutor(max_workers=4) as executor,
+    ):
+        list(
+            executor.map(
+                lambda _: fetch_page(session, server.base_url, bucket), range(count)
+            )
+        )
+    times = sorted(at for _, at in server.requests)
+    # after the initial burst, requests arrive no faster than the rate
+    assert len(times) == count
+    assert times[-1] - times[0] >= (count - capacity) / rate * 0.9